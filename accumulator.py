@@ -0,0 +1,56 @@
+"""Running CPI totals that are updated in place as entries change."""
+
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+
+class CPIAccumulator:
+    # Keeps each entry's contribution so add/edit/remove are O(1).
+    # Weighted points are integers in units of 1/scale, so totals never drift.
+
+    def __init__(self, scale=1, rounding=DEFAULT_ROUNDING):
+        self._entries = {}
+        self.weighted_points = 0
+        self.credits = 0
+        self.scale = scale
+        self.rounding = rounding
+
+    def set(self, key, credits, weighted_points):
+        # Add an entry, or replace its previous contribution
+        previous = self._entries.get(key)
+        if previous == (credits, weighted_points):
+            return
+        if previous is not None:
+            self.credits -= previous[0]
+            self.weighted_points -= previous[1]
+        self._entries[key] = (credits, weighted_points)
+        self.credits += credits
+        self.weighted_points += weighted_points
+
+    def set_course(self, key, credits, grade_point):
+        self.set(key, credits, grade_point * credits * self.scale)
+
+    def discard(self, key):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.credits -= previous[0]
+            self.weighted_points -= previous[1]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def contributions(self):
+        # (credits, weighted_points) of every entry, in no particular order
+        return list(self._entries.values())
+
+    @property
+    def total_points(self):
+        return self.weighted_points / self.scale if self.scale != 1 else self.weighted_points
+
+    @property
+    def cpi(self):
+        if self.credits <= 0:
+            return 0
+        return round_cpi(self.weighted_points, self.credits * self.scale, self.rounding)
@@ -0,0 +1,231 @@
+"""HTTP JSON API for the three calculator modes, with batched computation.
+
+Endpoints (all POST, JSON bodies):
+  /spi      {"courses": [{"name": "MTH101", "credits": 11, "grade": "A"}, ...]}
+            courses without a name are skipped, as in the Single Semester mode
+  /overall  {"semesters": [{"cpi": 8.5, "credits": 36}, ...]}
+  /quick    {"subjects": [{"credits": 9, "grade": "B+"}, ...]}
+and GET /health.
+
+Concurrent requests are queued for a short window and computed together as one
+vectorized numpy reduction.
+
+Usage: python api_server.py [--host 127.0.0.1] [--port 8502]
+"""
+
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+from grade_scale import GRADE_SCALE
+from rounding import round_cpi
+
+ENDPOINTS = ("/spi", "/overall", "/quick")
+MAX_BODY_BYTES = 1 << 20
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large"}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Batcher:
+    # Collects (weights, credits) pairs and reduces a whole batch with one int64 cumulative sum
+
+    def __init__(self, window=0.001, max_batch=1024):
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []
+        self._flush_handle = None
+
+    def submit(self, weights, credits):
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((weights, credits, future))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return future
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        # Integer sums, so every request gets exactly the totals the app would compute
+        sizes = np.fromiter((len(c) for _, c, _ in batch), dtype=np.int64, count=len(batch))
+        ends = np.cumsum(sizes)
+        weights = np.concatenate([np.asarray(w, dtype=np.int64) for w, _, _ in batch] + [np.empty(0, np.int64)])
+        credits = np.concatenate([np.asarray(c, dtype=np.int64) for _, c, _ in batch] + [np.empty(0, np.int64)])
+        point_sums = np.concatenate(([0], np.cumsum(weights * credits)))
+        credit_sums = np.concatenate(([0], np.cumsum(credits)))
+        total_points = point_sums[ends] - point_sums[ends - sizes]
+        total_credits = credit_sums[ends] - credit_sums[ends - sizes]
+
+        for (_, _, future), points, credit_sum in zip(batch, total_points.tolist(), total_credits.tolist()):
+            if not future.done():
+                future.set_result((points, credit_sum))
+
+
+def _entries(body, field):
+    entries = body.get(field)
+    if not isinstance(entries, list):
+        raise RequestError(400, f"'{field}' must be a list")
+    return entries
+
+
+def _number(entry, key, minimum, maximum, integer=False):
+    value = entry.get(key) if isinstance(entry, dict) else None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not minimum <= value <= maximum:
+        raise RequestError(400, f"'{key}' must be a number between {minimum} and {maximum}")
+    if integer:
+        if not float(value).is_integer():
+            raise RequestError(400, f"'{key}' must be a whole number")
+        return int(value)
+    return value
+
+
+def _course_columns(entries, skip_unnamed):
+    grade_points = GRADE_SCALE.points
+    points, credits = [], []
+    for entry in entries:
+        if skip_unnamed and not (isinstance(entry, dict) and entry.get("name")):
+            continue
+        credit = _number(entry, "credits", 1, 50, integer=True)
+        grade = entry.get("grade")
+        if not isinstance(grade, str) or grade not in grade_points:
+            raise RequestError(400, f"Unknown grade: {grade!r}")
+        points.append(grade_points[grade])
+        credits.append(credit)
+    return points, credits
+
+
+async def compute(batcher, path, body):
+    # Weighted points are integers in units of 1/scale, as in the app's CPIAccumulator
+    scale = 1
+    if path == "/overall":
+        semesters = [(_number(e, "cpi", 0, 10), _number(e, "credits", 1, 500, integer=True))
+                     for e in _entries(body, "semesters")]
+        # Semesters with a zero CPI are skipped, as in the Overall CPI mode; CPIs count in hundredths
+        scale = 100
+        weights = [round(cpi * 100) for cpi, _ in semesters if cpi > 0]
+        credits = [credit for cpi, credit in semesters if cpi > 0]
+    elif path == "/spi":
+        weights, credits = _course_columns(_entries(body, "courses"), skip_unnamed=True)
+    elif path == "/quick":
+        weights, credits = _course_columns(_entries(body, "subjects"), skip_unnamed=False)
+    else:
+        raise RequestError(404, f"No endpoint {path}")
+
+    total_points, total_credits = await batcher.submit(weights, credits)
+    return {
+        "cpi": round_cpi(total_points, total_credits * scale) if total_credits > 0 else 0,
+        "total_credits": total_credits,
+        "total_grade_points": total_points / scale if scale != 1 else total_points,
+    }
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, version = request_line.decode("latin-1").split(" ", 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b""
+    keep_alive = headers.get("connection", "").lower() != "close" and version.strip() == "HTTP/1.1"
+    return method, path.split("?", 1)[0], body, keep_alive
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode() + body
+
+
+async def handle_connection(batcher, reader, writer):
+    try:
+        while True:
+            keep_alive = False
+            try:
+                request = await _read_request(reader)
+                if request is None:
+                    break
+                method, path, body, keep_alive = request
+                if method == "GET" and path == "/health":
+                    status, payload = 200, {"status": "ok"}
+                elif path not in ENDPOINTS:
+                    raise RequestError(404, f"No endpoint {path}")
+                elif method != "POST":
+                    raise RequestError(405, "Use POST")
+                else:
+                    try:
+                        data = json.loads(body or b"{}")
+                    except ValueError:
+                        raise RequestError(400, "Body must be valid JSON") from None
+                    if not isinstance(data, dict):
+                        raise RequestError(400, "Body must be a JSON object")
+                    status, payload = 200, await compute(batcher, path, data)
+            except RequestError as exc:
+                status, payload = exc.status, {"error": str(exc)}
+            except (ValueError, asyncio.IncompleteReadError):
+                status, payload, keep_alive = 400, {"error": "Malformed HTTP request"}, False
+
+            writer.write(_response(status, payload, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host, port, window, max_batch):
+    batcher = Batcher(window, max_batch)
+    server = await asyncio.start_server(
+        lambda reader, writer: handle_connection(batcher, reader, writer), host, port, backlog=1024
+    )
+    print(f"CPI API listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--batch-window-ms", type=float, default=1.0,
+                        help="how long to wait for more requests before computing a batch")
+    parser.add_argument("--max-batch", type=int, default=1024)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.host, args.port, args.batch_window_ms / 1000, args.max_batch))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
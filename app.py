@@ -1,7 +1,265 @@
+import os
+from collections import deque
+
 import streamlit as st
-import pandas as pd
+
+import instrumentation
+
+from grade_scale import GRADE_SCALE
+from accumulator import CPIAccumulator
+from transcript import Transcript
+from rounding import round_cpi
+from planner import plan_target_cpi
+from transcript_store import QUICK_SEMESTER, TranscriptStore
+from result_cache import DEFAULT_MAX_ENTRIES, ResultCache
+
+
+@st.cache_data
+def grade_scale_table(rows):
+    # Built once per grading scheme and reused across reruns and sessions.
+    # Plain markdown keeps pandas out of the first render; it is imported lazily.
+    lines = ["| Grade | Points |", "| :-- | --: |"]
+    lines.extend(f"| {grade} | {points} |" for grade, points in rows)
+    return "\n".join(lines)
+
+
+@st.cache_resource
+def get_transcript_store():
+    # One pooled SQLite connection shared by every session in this process
+    return TranscriptStore(os.environ.get("CPI_DB_PATH", "transcripts.db"))
+
+
+@st.cache_resource
+def get_result_cache():
+    # One LRU of computed results shared by every session in this process
+    return ResultCache(int(os.environ.get("CPI_RESULT_CACHE_SIZE", DEFAULT_MAX_ENTRIES)))
+
+
+def cached_summary(totals):
+    # Credits, points and CPI keyed by the multiset of the accumulator's entries
+    return get_result_cache().summary(totals.contributions(), totals.scale, totals.rounding)
+
+
+def cached_breakdown_table(kind, rows, build_columns):
+    # Breakdown tables show names and entry order, so they are keyed by the ordered rows
+    def build():
+        import pandas as pd
+        return pd.DataFrame(build_columns())
+    
+    return get_result_cache().get_or_compute(("breakdown", kind, tuple(rows)), build)
+
+
+@st.cache_resource
+def get_history_cache():
+    # Memory-mapped final transcripts (see columnar_cache.py), when configured
+    path = os.environ.get("CPI_HISTORY_CACHE")
+    if not path or not os.path.isdir(path):
+        return None
+    from columnar_cache import ColumnarCache
+    return ColumnarCache(path)
+
+
+@st.cache_data(max_entries=4, show_spinner="Reading grade sheet...")
+def grade_sheet_totals(file_id, _sheet):
+    # Ingested once per uploaded file rather than on every rerun of the page
+    from ingest import ingest_grade_sheet
+    
+    _sheet.seek(0)
+    return ingest_grade_sheet(_sheet, grade_points=GRADE_SCALE.points)
+
+
+@st.cache_resource(max_entries=4, show_spinner="Building cohort index...")
+def cohort_index_for(file_id, _sheet):
+    # Built once per uploaded file and shared by every session that views it
+    from cohort_analytics import build_cohort_index
+    from ingest import iter_grade_batches
+    
+    _sheet.seek(0)
+    batches = iter_grade_batches(_sheet, optional_columns=("course", "batch", "department"))
+    return build_cohort_index(batches, GRADE_SCALE.points)
+
+
+def clear_widget_state(*prefixes):
+    # Drop stored widget values so the widgets pick up freshly loaded data
+    for key in list(st.session_state.keys()):
+        if isinstance(key, str) and key.startswith(prefixes):
+            del st.session_state[key]
+
+
+def sync_totals(transcript, totals, named_only=True):
+    # Fold every row of the transcript into the accumulator; unchanged rows are no-ops
+    for i in range(len(transcript)):
+        if named_only and not transcript.names[i]:
+            totals.discard(i)
+        else:
+            totals.set_course(i, transcript.credits[i], transcript.grade_point(i))
+
+
+def load_transcript(calc_type, semester):
+    student_id = st.session_state.student_id.strip()
+    store = get_transcript_store()
+    
+    if calc_type == "Single Semester CPI":
+        entries = store.load_courses(student_id, semester).get(semester, [])[:15]
+        if entries:
+            st.session_state.courses = Transcript.from_rows(entries)
+            st.session_state.course_totals = CPIAccumulator()
+            sync_totals(st.session_state.courses, st.session_state.course_totals)
+            st.session_state.num_courses = len(entries)
+            clear_widget_state("name_", "credit_", "grade_")
+    elif calc_type == "Overall CPI (Multiple Semesters)":
+        entries = store.load_semesters(student_id)
+        history = get_history_cache()
+        if not entries and history is not None:
+            # Final results from the columnar history cache, with exact integer totals
+            for row in history.student_history(student_id, GRADE_SCALE.points):
+                cpi, credits, points = float(row['spi']), int(row['credits']), int(row['weighted_points'])
+                # Semesters with no graded credits have no SPI to fold in
+                if credits > 0:
+                    entries.append({'name': f"Semester {row['semester']}", 'cpi': cpi, 'credits': credits,
+                                    'points': points, 'points_for': (cpi, credits)})
+        if not entries:
+            # Fall back to saved course-level data, one query for all semesters
+            for sem, rows in store.load_courses(student_id).items():
+                # Unnamed default rows are saved too, but never count towards the SPI
+                rows = [row for row in rows if row[0]]
+                credits = sum(credit for _, credit, _ in rows)
+                if sem != QUICK_SEMESTER and credits > 0:
+                    points = sum(GRADE_SCALE.points[grade] * credit for _, credit, grade in rows)
+                    # Keep the exact integer total so the overall CPI is not built from rounded SPIs
+                    cpi = round_cpi(points, credits)
+                    entries.append({'name': f"Semester {sem}", 'cpi': cpi, 'credits': credits,
+                                    'points': points, 'points_for': (cpi, credits)})
+        available = len(entries)
+        entries = entries[:8]
+        if entries:
+            st.session_state.semesters = entries
+            st.session_state.semester_totals = CPIAccumulator(scale=100)
+            st.session_state.num_semesters = len(entries)
+            clear_widget_state("sem_name_", "sem_cpi_", "sem_credits_")
+        if available > len(entries):
+            # The page holds at most 8 semesters; say so rather than dropping the rest silently
+            st.session_state.store_status = ("warning", f"Loaded the first 8 of {available} semesters for {student_id}")
+            return
+    else:
+        entries = store.load_courses(student_id, QUICK_SEMESTER).get(QUICK_SEMESTER, [])[:20]
+        if entries:
+            st.session_state.quick_subjects = Transcript.from_rows(entries)
+            st.session_state.quick_totals = CPIAccumulator()
+            sync_totals(st.session_state.quick_subjects, st.session_state.quick_totals, named_only=False)
+            st.session_state.num_subjects = len(entries)
+            clear_widget_state("quick_credit_", "quick_grade_")
+    
+    if entries:
+        st.session_state.store_status = ("success", f"Loaded {len(entries)} entries for {student_id}")
+    else:
+        st.session_state.store_status = ("warning", f"No saved data for {student_id}")
+
+
+def save_transcript(calc_type, semester):
+    student_id = st.session_state.student_id.strip()
+    store = get_transcript_store()
+    
+    if calc_type == "Single Semester CPI":
+        store.save_courses(student_id, semester, st.session_state.courses.rows() if 'courses' in st.session_state else [])
+    elif calc_type == "Overall CPI (Multiple Semesters)":
+        store.save_semesters(student_id, st.session_state.get('semesters', []))
+    else:
+        store.save_courses(student_id, QUICK_SEMESTER, st.session_state.quick_subjects.rows() if 'quick_subjects' in st.session_state else [])
+    st.session_state.store_status = ("success", f"Saved for {student_id}")
+
+
+def show_cpi_result(cpi, label="CPI", scope=""):
+    # Display results
+    st.success(f"**Your {label}: {cpi:.2f}**")
+    
+    # Performance indicator
+    if cpi >= 9.0:
+        with instrumentation.span("result.balloons"):
+            st.balloons()
+        st.success(f"🌟 Outstanding {scope}Performance!")
+    elif cpi >= 8.0:
+        st.success(f"🎉 Excellent {scope}Performance!")
+    elif cpi >= 7.0:
+        st.info(f"👍 Good {scope}Performance!")
+    elif cpi >= 6.0:
+        st.warning("📈 Average Performance - Keep improving!")
+    else:
+        st.error("📚 Need more effort - You can do better!")
+
+
+def batch_course_editor(transcript, grade_scale, key, with_names=True):
+    # Edit all courses in one form so the whole table submits as a single rerun
+    import pandas as pd
+    
+    columns = {}
+    if with_names:
+        columns["Course"] = transcript.names
+    columns["Credits"] = transcript.credits.tolist()
+    columns["Grade"] = [grade_scale.options[code] for code in transcript.grade_codes]
+    
+    with st.form(f"{key}_form"):
+        edited = st.data_editor(
+            pd.DataFrame(columns),
+            column_config={
+                "Course": st.column_config.TextColumn("Course Name"),
+                "Credits": st.column_config.NumberColumn("Credits", min_value=1, max_value=10, step=1, required=True),
+                "Grade": st.column_config.SelectboxColumn("Grade", options=list(grade_scale.options), required=True),
+            },
+            num_rows="fixed",
+            hide_index=True,
+            use_container_width=True,
+            key=f"{key}_{len(transcript)}"
+        )
+        submitted = st.form_submit_button("🧮 Submit & Calculate CPI", type="primary")
+    
+    return edited if submitted else None
+
+
+def show_rerun_stats(recent_reruns=20):
+    # Rerun counter, timing and span panel; the panel itself is not part of the timings
+    profiles = st.session_state.get('rerun_profiles', ())
+    with st.expander("⏱️ Rerun Stats"):
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Reruns", st.session_state.get('rerun_count', 0))
+        with col2:
+            st.metric("Last Rerun", f"{profiles[-1]['total'] * 1000:.0f} ms" if profiles else "-")
+        if profiles:
+            st.caption(f"Average of last {len(profiles)}: {sum(p['total'] for p in profiles) / len(profiles) * 1000:.0f} ms")
+        cache = get_result_cache().stats()
+        st.caption(
+            f"Result cache: {cache['hits']} hits, {cache['misses']} misses "
+            f"({cache['hit_rate']:.0%}), {cache['entries']}/{cache['max_entries']} entries"
+        )
+        
+        if st.toggle("🛠️ Span timings", key="debug_spans"):
+            st.dataframe([
+                {"Mode": p['mode'], "Total (ms)": round(p['total'] * 1000, 1),
+                 **{name: round(seconds * 1000, 1) for name, seconds in p['spans'].items()}}
+                for p in reversed(list(profiles)[-recent_reruns:])
+            ], hide_index=True, use_container_width=True)
+            
+            # Exports cover every session in this process
+            records = instrumentation.history()
+            st.download_button("Export JSON lines", instrumentation.to_json_lines(records),
+                               file_name="reruns.jsonl", mime="application/jsonl", use_container_width=True)
+            st.download_button("Export Prometheus", instrumentation.to_prometheus(records),
+                               file_name="reruns.prom", mime="text/plain", use_container_width=True)
+
+
+def record_rerun(calc_type):
+    record = instrumentation.finish_rerun(calc_type)
+    if 'rerun_profiles' not in st.session_state:
+        st.session_state.rerun_profiles = deque(maxlen=50)
+    st.session_state.rerun_profiles.append(record)
+
 
 def main():
+    instrumentation.start_rerun()
+    instrumentation.section("setup")
+    st.session_state.rerun_count = st.session_state.get('rerun_count', 0) + 1
+    
     # Page configuration
     st.set_page_config(
         page_title="IITK CPI Calculator",
@@ -13,24 +271,17 @@ def main():
     st.title("🎓 IIT Kanpur CPI Calculator")
     st.markdown("---")
     
-    # Grade point mapping
-    grade_points = {
-        "A+": 10,
-        "A": 10,
-        "B+": 9,
-        "B": 8,
-        "C+": 7,
-        "C": 6,
-        "D+": 5,
-        "D": 4
-    }
+    # Grade point mapping (loaded once per process)
+    grade_scale = GRADE_SCALE
+    grade_points = grade_scale.points
     
     # Sidebar for calculator type and semester selection
+    instrumentation.section("sidebar")
     with st.sidebar:
         st.header("🎯 Calculator Type")
         calc_type = st.radio(
             "Choose Calculator:",
-            ["Single Semester CPI", "Overall CPI (Multiple Semesters)", "Quick CPI Calculator"],
+            ["Single Semester CPI", "Overall CPI (Multiple Semesters)", "Quick CPI Calculator", "Cohort Analytics"],
             index=0
         )
         
@@ -42,46 +293,100 @@ def main():
                 format_func=lambda x: f"Semester {x}"
             )
             
+            if 'num_courses' not in st.session_state:
+                st.session_state.num_courses = 5
             num_courses = st.number_input(
                 "Number of Courses:",
                 min_value=1,
                 max_value=15,
-                value=5,
-                step=1
+                step=1,
+                key="num_courses"
             )
+            batch_entry = st.toggle("📝 Batch entry (one rerun per submit)", key="batch_entry")
         elif calc_type == "Overall CPI (Multiple Semesters)":
             st.header("📚 Overall CPI Details")
+            if 'num_semesters' not in st.session_state:
+                st.session_state.num_semesters = 2
             num_semesters = st.number_input(
                 "Number of Semesters:",
                 min_value=1,
                 max_value=8,
-                value=2,
-                step=1
+                step=1,
+                key="num_semesters"
             )
-        else:  # Quick CPI Calculator
+        elif calc_type == "Quick CPI Calculator":
             st.header("⚡ Quick Calculator")
+            if 'num_subjects' not in st.session_state:
+                st.session_state.num_subjects = 5
             num_subjects = st.number_input(
                 "Number of Subjects:",
                 min_value=1,
                 max_value=20,
-                value=5,
-                step=1
+                step=1,
+                key="num_subjects"
             )
+            batch_entry = st.toggle("📝 Batch entry (one rerun per submit)", key="batch_entry")
+        else:  # Cohort Analytics
+            st.header("📈 Cohort Analytics")
+            st.caption("Percentiles and distributions for a whole cohort's grade sheet.")
+        
+        if calc_type != "Cohort Analytics":
+            # Save and reload entries by student ID
+            st.header("💾 Saved Transcript")
+            student_id = st.text_input("Student ID:", key="student_id", placeholder="e.g., 220123")
+            store_semester = semester if calc_type == "Single Semester CPI" else None
+            cols = st.columns(2)
+            with cols[0]:
+                st.button("📥 Load", on_click=load_transcript, args=(calc_type, store_semester),
+                          disabled=not student_id.strip(), use_container_width=True)
+            with cols[1]:
+                st.button("💾 Save", on_click=save_transcript, args=(calc_type, store_semester),
+                          disabled=not student_id.strip(), use_container_width=True)
+            if 'store_status' in st.session_state:
+                status, message = st.session_state.pop('store_status')
+                getattr(st, status)(message)
     
     # Main content area
     if calc_type == "Single Semester CPI":
         # Single Semester CPI Calculator
         st.header(f"Semester {semester} - Course Details")
-        
+        instrumentation.section("single.import")
+
+        # Bulk import of a grade sheet export (CSV or Parquet)
+        with st.expander("📂 Import Grade Sheet (CSV / Parquet)"):
+            st.caption("Columns required: student_id, credits, grade. Large files are read in batches.")
+            uploaded_sheet = st.file_uploader(
+                "Upload grade sheet",
+                type=["csv", "parquet"],
+                key="grade_sheet"
+            )
+            if uploaded_sheet is not None:
+                try:
+                    sheet_totals = grade_sheet_totals(uploaded_sheet.file_id, uploaded_sheet)
+                except (ValueError, KeyError) as exc:
+                    st.error(f"Could not read grade sheet: {exc}")
+                else:
+                    st.dataframe(sheet_totals, use_container_width=True)
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        st.metric("Students", len(sheet_totals))
+                    with col2:
+                        st.metric("Average CPI", f"{sheet_totals['cpi'].mean():.2f}")
+
         # Initialize session state for course data
+        instrumentation.section("single.courses")
         if 'courses' not in st.session_state:
-            st.session_state.courses = []
+            st.session_state.courses = Transcript(grade_scale)
+        if 'course_totals' not in st.session_state:
+            st.session_state.course_totals = CPIAccumulator()
+        course_totals = st.session_state.course_totals
         
         # Adjust courses list based on num_courses
         while len(st.session_state.courses) < num_courses:
-            st.session_state.courses.append({'name': '', 'credit': 9, 'grade': 'A'})
+            st.session_state.courses.append('', 9, grade_scale.options[0])
         while len(st.session_state.courses) > num_courses:
             st.session_state.courses.pop()
+            course_totals.discard(len(st.session_state.courses))
         
         # Create columns for better layout
         col1, col2 = st.columns([2, 1])
@@ -89,111 +394,92 @@ def main():
         with col1:
             st.subheader("Enter Course Information")
             
-            # Course input form
-            for i in range(num_courses):
-                st.markdown(f"**Course {i+1}:**")
-                cols = st.columns([3, 1, 1])
-                
-                with cols[0]:
-                    course_name = st.text_input(
-                        f"Course Name",
-                        value=st.session_state.courses[i]['name'],
-                        key=f"name_{i}",
-                        placeholder=f"e.g., Mathematics-I, Physics-I"
-                    )
-                    st.session_state.courses[i]['name'] = course_name
-                
-                with cols[1]:
-                    credit = st.number_input(
-                        f"Credits",
-                        min_value=1,
-                        max_value=10,
-                        value=st.session_state.courses[i]['credit'],
-                        key=f"credit_{i}"
-                    )
-                    st.session_state.courses[i]['credit'] = credit
-                
-                with cols[2]:
-                    grade = st.selectbox(
-                        f"Grade",
-                        options=list(grade_points.keys()),
-                        index=list(grade_points.keys()).index(st.session_state.courses[i]['grade']),
-                        key=f"grade_{i}"
-                    )
-                    st.session_state.courses[i]['grade'] = grade
-                
-                st.markdown("---")
+            if batch_entry:
+                # Rows added by the course count or a Load never pass through the form
+                sync_totals(st.session_state.courses, course_totals)
+                edited = batch_course_editor(st.session_state.courses, grade_scale, key="course_editor")
+                if edited is not None:
+                    for i, row in enumerate(edited.itertuples(index=False)):
+                        course_name = row.Course or ''
+                        st.session_state.courses.set(i, course_name, int(row.Credits), row.Grade)
+                        if course_name:
+                            course_totals.set_course(i, int(row.Credits), grade_points[row.Grade])
+                        else:
+                            course_totals.discard(i)
+                    
+                    if course_totals.credits > 0:
+                        show_cpi_result(cached_summary(course_totals)["cpi"])
+                    else:
+                        st.error("Please enter at least one course with a name!")
+            else:
+                # Course input form
+                courses = st.session_state.courses
+                for i in range(num_courses):
+                    st.markdown(f"**Course {i+1}:**")
+                    cols = st.columns([3, 1, 1])
+                    
+                    with cols[0]:
+                        course_name = st.text_input(
+                            f"Course Name",
+                            value=courses.names[i],
+                            key=f"name_{i}",
+                            placeholder=f"e.g., Mathematics-I, Physics-I"
+                        )
+                    
+                    with cols[1]:
+                        credit = st.number_input(
+                            f"Credits",
+                            min_value=1,
+                            max_value=10,
+                            value=courses.credits[i],
+                            key=f"credit_{i}"
+                        )
+                    
+                    with cols[2]:
+                        grade = st.selectbox(
+                            f"Grade",
+                            options=grade_scale.options,
+                            index=courses.grade_codes[i],
+                            key=f"grade_{i}"
+                        )
+                    
+                    courses.set(i, course_name, credit, grade)
+                    
+                    # Only courses with names count towards the CPI
+                    if course_name:
+                        course_totals.set_course(i, credit, grade_points[grade])
+                    else:
+                        course_totals.discard(i)
+                    
+                    st.markdown("---")
         
+        instrumentation.section("single.calculate")
         with col2:
             st.subheader("Grade Point Scale")
-            grade_df = pd.DataFrame([
-                {"Grade": grade, "Points": points} 
-                for grade, points in grade_points.items()
-            ])
-            st.dataframe(grade_df, use_container_width=True)
+            st.markdown(grade_scale_table(grade_scale.rows))
             
             # Calculate CPI button
             if st.button("🧮 Calculate CPI", type="primary", use_container_width=True):
-                total_grade_points = 0
-                total_credits = 0
-                
-                # Calculate CPI
-                for course in st.session_state.courses:
-                    if course['name']:  # Only include courses with names
-                        grade_point = grade_points[course['grade']]
-                        credit = course['credit']
-                        total_grade_points += grade_point * credit
-                        total_credits += credit
-                
-                if total_credits > 0:
-                    cpi = total_grade_points / total_credits
-                    
-                    # Display results
-                    st.success(f"**Your CPI: {cpi:.2f}**")
-                    
-                    # Performance indicator
-                    if cpi >= 9.0:
-                        st.balloons()
-                        st.success("🌟 Outstanding Performance!")
-                    elif cpi >= 8.0:
-                        st.success("🎉 Excellent Performance!")
-                    elif cpi >= 7.0:
-                        st.info("👍 Good Performance!")
-                    elif cpi >= 6.0:
-                        st.warning("📈 Average Performance - Keep improving!")
-                    else:
-                        st.error("📚 Need more effort - You can do better!")
+                # Totals are kept up to date by the accumulator
+                if course_totals.credits > 0:
+                    show_cpi_result(cached_summary(course_totals)["cpi"])
                 else:
                     st.error("Please enter at least one course with a name!")
         
         # Detailed breakdown for single semester
+        instrumentation.section("single.breakdown")
         if st.button("📊 Show Detailed Breakdown"):
             st.subheader("Detailed Calculation Breakdown")
             
-            breakdown_data = []
-            total_grade_points = 0
-            total_credits = 0
-            
-            for i, course in enumerate(st.session_state.courses):
-                if course['name']:
-                    grade_point = grade_points[course['grade']]
-                    credit = course['credit']
-                    weighted_points = grade_point * credit
-                    
-                    breakdown_data.append({
-                        "Course": course['name'] or f"Course {i+1}",
-                        "Credits": credit,
-                        "Grade": course['grade'],
-                        "Grade Points": grade_point,
-                        "Weighted Points": weighted_points
-                    })
-                    
-                    total_grade_points += weighted_points
-                    total_credits += credit
+            courses = st.session_state.courses
+            breakdown_data = cached_breakdown_table("single", courses.rows(), lambda: courses.breakdown_columns("Course"))
+            summary = cached_summary(course_totals)
+            total_grade_points = summary["total_points"]
+            total_credits = summary["credits"]
             
-            if breakdown_data:
-                df = pd.DataFrame(breakdown_data)
-                st.dataframe(df, use_container_width=True)
+            if len(breakdown_data):
+                with instrumentation.span("breakdown.table"):
+                    st.dataframe(breakdown_data, use_container_width=True)
                 
                 # Summary
                 col1, col2, col3 = st.columns(3)
@@ -202,7 +488,7 @@ def main():
                 with col2:
                     st.metric("Total Grade Points", f"{total_grade_points:.1f}")
                 with col3:
-                    cpi = total_grade_points / total_credits if total_credits > 0 else 0
+                    cpi = summary["cpi"]
                     st.metric("Final CPI", f"{cpi:.2f}")
                 
                 # Formula explanation
@@ -213,16 +499,22 @@ def main():
     elif calc_type == "Overall CPI (Multiple Semesters)":
         # Overall CPI Calculator
         st.header(f"Overall CPI Calculator - {num_semesters} Semesters")
+        instrumentation.section("overall.semesters")
         
         # Initialize session state for semester data
         if 'semesters' not in st.session_state:
             st.session_state.semesters = []
+        if 'semester_totals' not in st.session_state:
+            # Semester CPIs have two decimals, so weighted totals are kept in hundredths
+            st.session_state.semester_totals = CPIAccumulator(scale=100)
+        semester_totals = st.session_state.semester_totals
         
         # Adjust semesters list based on num_semesters
         while len(st.session_state.semesters) < num_semesters:
             st.session_state.semesters.append({'name': f'Semester {len(st.session_state.semesters) + 1}', 'cpi': 9.0, 'credits': 36})
         while len(st.session_state.semesters) > num_semesters:
             st.session_state.semesters.pop()
+            semester_totals.discard(len(st.session_state.semesters))
         
         # Create columns for better layout
         col1, col2 = st.columns([2, 1])
@@ -261,80 +553,67 @@ def main():
                     sem_credits = st.number_input(
                         f"Credits",
                         min_value=1,
-                        max_value=50,
                         value=st.session_state.semesters[i]['credits'],
                         key=f"sem_credits_{i}"
                     )
                     st.session_state.semesters[i]['credits'] = sem_credits
                 
+                # Fold the semester aggregate into the running totals, using the
+                # course-level total while the loaded semester is left unedited
+                if sem_name and sem_cpi > 0:
+                    semester = st.session_state.semesters[i]
+                    if 'points' in semester and semester['points_for'] == (sem_cpi, sem_credits):
+                        semester_totals.set(i, sem_credits, semester['points'] * 100)
+                    else:
+                        semester_totals.set(i, sem_credits, round(sem_cpi * 100) * sem_credits)
+                else:
+                    semester_totals.discard(i)
+                
                 st.markdown("---")
         
+        instrumentation.section("overall.calculate")
         with col2:
             st.subheader("Grade Point Scale")
-            grade_df = pd.DataFrame([
-                {"Grade": grade, "Points": points} 
-                for grade, points in grade_points.items()
-            ])
-            st.dataframe(grade_df, use_container_width=True)
+            st.markdown(grade_scale_table(grade_scale.rows))
             
             # Calculate Overall CPI button
             if st.button("🧮 Calculate Overall CPI", type="primary", use_container_width=True):
-                total_weighted_cpi = 0
-                total_credits = 0
-                
-                # Calculate Overall CPI
-                for semester in st.session_state.semesters:
-                    if semester['name'] and semester['cpi'] > 0:
-                        weighted_cpi = semester['cpi'] * semester['credits']
-                        total_weighted_cpi += weighted_cpi
-                        total_credits += semester['credits']
-                
-                if total_credits > 0:
-                    overall_cpi = total_weighted_cpi / total_credits
-                    
-                    # Display results
-                    st.success(f"**Your Overall CPI: {overall_cpi:.2f}**")
-                    
-                    # Performance indicator
-                    if overall_cpi >= 9.0:
-                        st.balloons()
-                        st.success("🌟 Outstanding Overall Performance!")
-                    elif overall_cpi >= 8.0:
-                        st.success("🎉 Excellent Overall Performance!")
-                    elif overall_cpi >= 7.0:
-                        st.info("👍 Good Overall Performance!")
-                    elif overall_cpi >= 6.0:
-                        st.warning("📈 Average Performance - Keep improving!")
-                    else:
-                        st.error("📚 Need more effort - You can do better!")
+                # Totals are kept up to date by the accumulator
+                if semester_totals.credits > 0:
+                    show_cpi_result(cached_summary(semester_totals)["cpi"], label="Overall CPI", scope="Overall ")
                 else:
                     st.error("Please enter valid CPI and credits for at least one semester!")
         
         # Detailed breakdown for overall CPI
+        instrumentation.section("overall.breakdown")
         if st.button("📊 Show Overall CPI Breakdown"):
             st.subheader("Overall CPI Calculation Breakdown")
             
-            breakdown_data = []
-            total_weighted_cpi = 0
-            total_credits = 0
-            
+            semesters = []
             for semester in st.session_state.semesters:
                 if semester['name'] and semester['cpi'] > 0:
-                    weighted_cpi = semester['cpi'] * semester['credits']
-                    
-                    breakdown_data.append({
-                        "Semester": semester['name'],
-                        "CPI": f"{semester['cpi']:.2f}",
-                        "Credits": semester['credits'],
-                        "Weighted CPI": f"{weighted_cpi:.2f}"
-                    })
-                    
-                    total_weighted_cpi += weighted_cpi
-                    total_credits += semester['credits']
+                    # Same weighting as the running totals, so the rows add up to the total below
+                    if 'points' in semester and semester['points_for'] == (semester['cpi'], semester['credits']):
+                        weighted = semester['points']
+                    else:
+                        weighted = round(semester['cpi'] * 100) * semester['credits'] / 100
+                    semesters.append((semester['name'], semester['cpi'], semester['credits'], weighted))
+            breakdown_data = cached_breakdown_table("overall", semesters, lambda: [
+                {
+                    "Semester": name,
+                    "CPI": f"{cpi:.2f}",
+                    "Credits": credits,
+                    "Weighted CPI": f"{weighted:.2f}"
+                }
+                for name, cpi, credits, weighted in semesters
+            ])
+            summary = cached_summary(semester_totals)
+            total_weighted_cpi = summary["total_points"]
+            total_credits = summary["credits"]
             
-            if breakdown_data:
-                df = pd.DataFrame(breakdown_data)
-                st.dataframe(df, use_container_width=True)
+            if len(breakdown_data):
+                with instrumentation.span("breakdown.table"):
+                    st.dataframe(breakdown_data, use_container_width=True)
                 
                 # Summary
                 col1, col2, col3 = st.columns(3)
@@ -343,27 +622,87 @@ def main():
                 with col2:
                     st.metric("Total Weighted CPI", f"{total_weighted_cpi:.2f}")
                 with col3:
-                    overall_cpi = total_weighted_cpi / total_credits if total_credits > 0 else 0
+                    overall_cpi = summary["cpi"]
                     st.metric("Overall CPI", f"{overall_cpi:.2f}")
                 
                 # Formula explanation
                 st.subheader("📐 Formula Used")
                 st.latex(r"Overall\_CPI = \frac{\sum (Semester\_CPI \times Credits)}{\sum Credits}")
                 st.write(f"Overall CPI = {total_weighted_cpi:.2f} ÷ {total_credits} = **{overall_cpi:.2f}**")
+        
+        # What-if planner for a target overall CPI
+        instrumentation.section("overall.planner")
+        with st.expander("🎯 Target CPI Planner"):
+            st.caption(
+                f"Current: CPI {semester_totals.cpi:.2f} over {semester_totals.credits} credits. "
+                "Finds the grade combinations with the fewest high grades that reach your target."
+            )
+            cols = st.columns([1, 2])
+            with cols[0]:
+                target_cpi = st.number_input(
+                    "Target CPI",
+                    min_value=0.0,
+                    max_value=10.0,
+                    value=min(10.0, round(semester_totals.cpi + 0.5, 2)),
+                    step=0.01,
+                    format="%.2f",
+                    key="target_cpi"
+                )
+            with cols[1]:
+                remaining_text = st.text_input(
+                    "Credits of remaining courses (comma separated)",
+                    value="9, 9, 9, 11, 6",
+                    key="remaining_credits"
+                )
+            
+            if st.button("🔍 Find Grade Plans"):
+                try:
+                    remaining_credits = [int(c) for c in remaining_text.replace(" ", "").split(",") if c]
+                except ValueError:
+                    remaining_credits = []
+                
+                if not remaining_credits or min(remaining_credits) < 1:
+                    st.error("Please enter the remaining course credits as positive whole numbers!")
+                else:
+                    with instrumentation.span("planner.search"):
+                        plan = plan_target_cpi(
+                            semester_totals.total_points / max(semester_totals.credits, 1),
+                            semester_totals.credits,
+                            remaining_credits,
+                            target_cpi,
+                            grade_points=grade_points
+                        )
+                    if plan["plans"]:
+                        st.dataframe([
+                            {
+                                **{f"Course {i+1} ({c} cr)": g for i, (c, g) in enumerate(zip(remaining_credits, p["grades"]))},
+                                "Resulting CPI": f"{p['cpi']:.2f}"
+                            }
+                            for p in plan["plans"]
+                        ], use_container_width=True)
+                    elif plan["complete"]:
+                        st.error("The target CPI cannot be reached with the remaining courses.")
+                    if not plan["complete"]:
+                        st.warning("Search stopped at the time limit; these are the best plans found so far.")
 
-    else:  # Quick CPI Calculator
+    elif calc_type == "Quick CPI Calculator":
         # Quick CPI Calculator
         st.header(f"⚡ Quick CPI Calculator - {num_subjects} Subjects")
+        instrumentation.section("quick.subjects")
         
         # Initialize session state for quick subjects data
         if 'quick_subjects' not in st.session_state:
-            st.session_state.quick_subjects = []
+            st.session_state.quick_subjects = Transcript(grade_scale)
+        if 'quick_totals' not in st.session_state:
+            st.session_state.quick_totals = CPIAccumulator()
+        quick_totals = st.session_state.quick_totals
         
         # Adjust subjects list based on num_subjects
         while len(st.session_state.quick_subjects) < num_subjects:
-            st.session_state.quick_subjects.append({'credit': 9, 'grade': 'A'})
+            st.session_state.quick_subjects.append('', 9, grade_scale.options[0])
         while len(st.session_state.quick_subjects) > num_subjects:
             st.session_state.quick_subjects.pop()
+            quick_totals.discard(len(st.session_state.quick_subjects))
         
         # Create columns for better layout
         col1, col2 = st.columns([2, 1])
@@ -372,98 +711,70 @@ def main():
             st.subheader("Enter Credits and Grades Only")
             st.info("💡 Simple & Fast - Just enter credits and grades for each subject!")
             
-            # Quick subject input form
-            for i in range(num_subjects):
-                st.markdown(f"**Subject {i+1}:**")
-                cols = st.columns([1, 1])
-                
-                with cols[0]:
-                    credit = st.number_input(
-                        f"Credits",
-                        min_value=1,
-                        max_value=10,
-                        value=st.session_state.quick_subjects[i]['credit'],
-                        key=f"quick_credit_{i}"
-                    )
-                    st.session_state.quick_subjects[i]['credit'] = credit
-                
-                with cols[1]:
-                    grade = st.selectbox(
-                        f"Grade",
-                        options=list(grade_points.keys()),
-                        index=list(grade_points.keys()).index(st.session_state.quick_subjects[i]['grade']),
-                        key=f"quick_grade_{i}"
-                    )
-                    st.session_state.quick_subjects[i]['grade'] = grade
-                
-                st.markdown("---")
+            if batch_entry:
+                # Rows added by the subject count or a Load never pass through the form
+                sync_totals(st.session_state.quick_subjects, quick_totals, named_only=False)
+                edited = batch_course_editor(st.session_state.quick_subjects, grade_scale, key="quick_editor", with_names=False)
+                if edited is not None:
+                    for i, row in enumerate(edited.itertuples(index=False)):
+                        st.session_state.quick_subjects.set(i, '', int(row.Credits), row.Grade)
+                        quick_totals.set_course(i, int(row.Credits), grade_points[row.Grade])
+                    
+                    show_cpi_result(cached_summary(quick_totals)["cpi"])
+            else:
+                # Quick subject input form
+                subjects = st.session_state.quick_subjects
+                for i in range(num_subjects):
+                    st.markdown(f"**Subject {i+1}:**")
+                    cols = st.columns([1, 1])
+                    
+                    with cols[0]:
+                        credit = st.number_input(
+                            f"Credits",
+                            min_value=1,
+                            max_value=10,
+                            value=subjects.credits[i],
+                            key=f"quick_credit_{i}"
+                        )
+                    
+                    with cols[1]:
+                        grade = st.selectbox(
+                            f"Grade",
+                            options=grade_scale.options,
+                            index=subjects.grade_codes[i],
+                            key=f"quick_grade_{i}"
+                        )
+                    
+                    subjects.set(i, '', credit, grade)
+                    quick_totals.set_course(i, credit, grade_points[grade])
+                    
+                    st.markdown("---")
         
+        instrumentation.section("quick.calculate")
         with col2:
             st.subheader("Grade Point Scale")
-            grade_df = pd.DataFrame([
-                {"Grade": grade, "Points": points} 
-                for grade, points in grade_points.items()
-            ])
-            st.dataframe(grade_df, use_container_width=True)
+            st.markdown(grade_scale_table(grade_scale.rows))
             
             # Calculate Quick CPI button
             if st.button("⚡ Calculate CPI", type="primary", use_container_width=True):
-                total_grade_points = 0
-                total_credits = 0
-                
-                # Calculate CPI
-                for subject in st.session_state.quick_subjects:
-                    grade_point = grade_points[subject['grade']]
-                    credit = subject['credit']
-                    total_grade_points += grade_point * credit
-                    total_credits += credit
-                
-                if total_credits > 0:
-                    cpi = total_grade_points / total_credits
-                    
-                    # Display results
-                    st.success(f"**Your CPI: {cpi:.2f}**")
-                    
-                    # Performance indicator
-                    if cpi >= 9.0:
-                        st.balloons()
-                        st.success("🌟 Outstanding Performance!")
-                    elif cpi >= 8.0:
-                        st.success("🎉 Excellent Performance!")
-                    elif cpi >= 7.0:
-                        st.info("👍 Good Performance!")
-                    elif cpi >= 6.0:
-                        st.warning("📈 Average Performance - Keep improving!")
-                    else:
-                        st.error("📚 Need more effort - You can do better!")
+                # Totals are kept up to date by the accumulator
+                if quick_totals.credits > 0:
+                    show_cpi_result(cached_summary(quick_totals)["cpi"])
         
         # Detailed breakdown for quick calculator
+        instrumentation.section("quick.breakdown")
         if st.button("📊 Show Quick Breakdown"):
             st.subheader("Quick Calculation Breakdown")
             
-            breakdown_data = []
-            total_grade_points = 0
-            total_credits = 0
+            subjects = st.session_state.quick_subjects
+            breakdown_data = cached_breakdown_table("quick", subjects.rows(), lambda: subjects.breakdown_columns("Subject", named_only=False))
+            summary = cached_summary(quick_totals)
+            total_grade_points = summary["total_points"]
+            total_credits = summary["credits"]
             
-            for i, subject in enumerate(st.session_state.quick_subjects):
-                grade_point = grade_points[subject['grade']]
-                credit = subject['credit']
-                weighted_points = grade_point * credit
-                
-                breakdown_data.append({
-                    "Subject": f"Subject {i+1}",
-                    "Credits": credit,
-                    "Grade": subject['grade'],
-                    "Grade Points": grade_point,
-                    "Weighted Points": weighted_points
-                })
-                
-                total_grade_points += weighted_points
-                total_credits += credit
-            
-            if breakdown_data:
-                df = pd.DataFrame(breakdown_data)
-                st.dataframe(df, use_container_width=True)
+            if len(breakdown_data):
+                with instrumentation.span("breakdown.table"):
+                    st.dataframe(breakdown_data, use_container_width=True)
                 
                 # Summary
                 col1, col2, col3 = st.columns(3)
@@ -472,7 +783,7 @@ def main():
                 with col2:
                     st.metric("Total Grade Points", f"{total_grade_points:.1f}")
                 with col3:
-                    cpi = total_grade_points / total_credits if total_credits > 0 else 0
+                    cpi = summary["cpi"]
                     st.metric("Final CPI", f"{cpi:.2f}")
                 
                 # Formula explanation
@@ -480,18 +791,103 @@ def main():
                 st.latex(r"CPI = \frac{\sum (Grade\_Points \times Credits)}{\sum Credits}")
                 st.write(f"CPI = {total_grade_points:.1f} ÷ {total_credits} = **{cpi:.2f}**")
     
+    else:  # Cohort Analytics
+        st.header("📈 Cohort Analytics")
+        instrumentation.section("cohort")
+        
+        cohort_sheet = st.file_uploader(
+            "Upload cohort grade sheet (CSV / Parquet)",
+            type=["csv", "parquet"],
+            key="cohort_sheet"
+        )
+        if cohort_sheet is None:
+            st.info(
+                "💡 Columns required: student_id, credits, grade. "
+                "Add course, batch and department columns for per-course and per-group views."
+            )
+        else:
+            try:
+                cohort = cohort_index_for(cohort_sheet.file_id, cohort_sheet)
+            except (ValueError, KeyError) as exc:
+                cohort = None
+                st.error(f"Could not read grade sheet: {exc}")
+            
+            if cohort is not None:
+                # Group filters
+                cols = st.columns(2)
+                with cols[0]:
+                    batch = st.selectbox("Batch", ["All"] + cohort.groups("batch"), key="cohort_batch")
+                with cols[1]:
+                    department = st.selectbox("Department", ["All"] + cohort.groups("department"), key="cohort_department")
+                batch = None if batch == "All" else batch
+                department = None if department == "All" else department
+                cpis = cohort.sorted_cpis(batch, department)
+                
+                if len(cpis) == 0:
+                    st.warning("No students in this group.")
+                else:
+                    # Summary
+                    col1, col2, col3 = st.columns(3)
+                    with col1:
+                        st.metric("Students", len(cpis))
+                    with col2:
+                        st.metric("Median CPI", f"{cpis[len(cpis) // 2]:.2f}")
+                    with col3:
+                        st.metric("Top 10% Cutoff", f"{cpis[int(len(cpis) * 0.9)]:.2f}")
+                    
+                    # Where do I stand
+                    st.subheader("📍 Where Do I Stand?")
+                    my_cpi = st.number_input(
+                        "Your CPI",
+                        min_value=0.0,
+                        max_value=10.0,
+                        value=8.0,
+                        step=0.01,
+                        format="%.2f",
+                        key="my_cpi"
+                    )
+                    rank = cohort.percentile_rank(my_cpi, batch, department)
+                    st.success(f"**{rank:.1f}th percentile** - you are in the top {max(100 - rank, 0):.1f}% of this group")
+                    
+                    # CPI distribution
+                    st.subheader("📊 CPI Distribution")
+                    edges, counts = cohort.histogram(batch, department)
+                    st.bar_chart(
+                        {"CPI": [f"{edge:.2f}" for edge in edges[:-1]], "Students": counts.tolist()},
+                        x="CPI",
+                        y="Students",
+                        sort=False
+                    )
+                
+                # Grade frequency per course
+                if cohort.courses():
+                    st.subheader("📚 Grade Frequency by Course")
+                    course = st.selectbox("Course", cohort.courses(), key="cohort_course")
+                    frequency = cohort.grade_frequency(course)
+                    st.bar_chart(
+                        {"Grade": list(frequency), "Students": list(frequency.values())},
+                        x="Grade",
+                        y="Students",
+                        sort=False
+                    )
+    
     # Footer
+    instrumentation.section("footer")
     st.markdown("---")
     st.markdown(
         """
         <div style='text-align: center; color: gray;'>
             <p>🏛️ IIT Kanpur CPI Calculator | Made with ❤️ using Streamlit</p>
-            <p><small>✨ Features: Single Semester CPI, Overall CPI & Quick CPI Calculator</small></p>
+            <p><small>✨ Features: Single Semester CPI, Overall CPI, Quick CPI Calculator & Cohort Analytics</small></p>
             <p><small>Note: This calculator follows the standard IITK grading system</small></p>
         </div>
         """, 
         unsafe_allow_html=True
     )
+    
+    record_rerun(calc_type)
+    with st.sidebar:
+        show_rerun_stats()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
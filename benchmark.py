@@ -0,0 +1,171 @@
+"""Benchmarks for CPI aggregation and page reruns; prints JSON results.
+
+Usage: python benchmark.py [--sizes 1000,100000,10000000] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+
+from accumulator import CPIAccumulator
+from cpi_engine import GRADE_POINTS, compute_spi_cpi
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+# Calculator label and the maximum of its count input
+MODES = {
+    "single": ("Single Semester CPI", 15),
+    "overall": ("Overall CPI (Multiple Semesters)", 8),
+    "quick": ("Quick CPI Calculator", 20),
+}
+
+
+def synthetic_cohort(rows, seed=0):
+    # About 40 course rows per student across 8 semesters
+    rng = np.random.default_rng(seed)
+    students = max(1, rows // 40)
+    return {
+        "student_id": rng.integers(0, students, rows),
+        "semester": rng.integers(1, 9, rows),
+        "credits": rng.integers(1, 11, rows),
+        "grade": rng.choice(list(GRADE_POINTS), rows).astype(object),
+    }
+
+
+def _timed(func, repeats):
+    times = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+    return times
+
+
+def _summary(times, rows=None):
+    result = {
+        "repeats": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "max_s": max(times),
+    }
+    if rows:
+        result["rows_per_s"] = rows / result["median_s"]
+    return result
+
+
+def bench_aggregation(sizes, repeats, loop_limit):
+    results = []
+    for rows in sizes:
+        cohort = synthetic_cohort(rows)
+
+        def engine():
+            compute_spi_cpi(cohort["student_id"], cohort["semester"], cohort["credits"], cohort["grade"])
+
+        results.append({"name": "engine.compute_spi_cpi", "rows": rows, **_summary(_timed(engine, repeats), rows)})
+
+        # The per-course Python paths used by the calculator branches; capped because they are O(rows)
+        if rows > loop_limit:
+            continue
+        credits = cohort["credits"].tolist()
+        grades = cohort["grade"].tolist()
+
+        def python_loop():
+            total_grade_points = 0
+            total_credits = 0
+            for credit, grade in zip(credits, grades):
+                total_grade_points += GRADE_POINTS[grade] * credit
+                total_credits += credit
+            return total_grade_points / total_credits
+
+        def accumulator():
+            totals = CPIAccumulator()
+            for i, (credit, grade) in enumerate(zip(credits, grades)):
+                totals.set_course(i, credit, GRADE_POINTS[grade])
+            return totals.cpi
+
+        results.append({"name": "python_loop", "rows": rows, **_summary(_timed(python_loop, repeats), rows)})
+        results.append({"name": "accumulator.build", "rows": rows, **_summary(_timed(accumulator, repeats), rows)})
+    return results
+
+
+def _render_app(mode, count):
+    from streamlit.testing.v1 import AppTest
+
+    label, limit = MODES[mode]
+    count = min(count, limit)
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    at.run()
+    at.sidebar.radio[0].set_value(label).run()
+    at.sidebar.number_input[0].set_value(count).run()
+    if mode == "single":
+        for i in range(count):
+            at.text_input(key=f"name_{i}").input(f"Course {i + 1}")
+        at.run()
+    return at, count
+
+
+def bench_render(counts, repeats):
+    results = []
+    for mode in MODES:
+        for requested in counts:
+            at, count = _render_app(mode, requested)
+            if count != requested and any(r["mode"] == mode and r["courses"] == count for r in results):
+                continue
+
+            rerun_times = _timed(at.run, repeats)
+            results.append({"name": "render.rerun", "mode": mode, "courses": count, **_summary(rerun_times)})
+
+            # The Calculate button is the first button in every mode
+            def click_calculate():
+                at.button[0].click().run()
+
+            results.append({"name": "render.calculate", "mode": mode, "courses": count,
+                            **_summary(_timed(click_calculate, repeats))})
+            if at.exception:
+                raise RuntimeError(f"{mode} render failed: {at.exception[0].message}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000,10000000",
+                        help="comma separated cohort sizes in course rows")
+    parser.add_argument("--courses", default="5,15,20",
+                        help="comma separated course counts for the render benchmark")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--loop-limit", type=int, default=1_000_000,
+                        help="largest cohort to run through the pure-Python paths")
+    parser.add_argument("--skip-render", action="store_true", help="skip the AppTest render benchmark")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+        },
+        "aggregation": bench_aggregation(
+            [int(s) for s in args.sizes.split(",")], args.repeats, args.loop_limit
+        ),
+    }
+    if not args.skip_render:
+        report["render"] = bench_render([int(c) for c in args.courses.split(",")], args.repeats)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Cohort analytics: sorted CPI arrays and histogram bins kept up to date incrementally."""
+
+import numpy as np
+import pandas as pd
+
+from cpi_engine import GRADE_POINTS
+from grade_scale import GRADE_SCALE
+from grading_policy import scale_policy
+from ingest import accumulate_totals
+from rounding import DEFAULT_ROUNDING
+
+# CPI histogram bins of width 0.25 over [0, 10]
+CPI_BIN_EDGES = np.linspace(0.0, 10.0, 41)
+ALL_STUDENTS = ("all",)
+
+
+def _group_keys(batch, department):
+    # Every student is counted in the overall, batch, department and batch+department groups
+    keys = [ALL_STUDENTS]
+    if batch is not None:
+        keys.append(("batch", batch))
+    if department is not None:
+        keys.append(("department", department))
+    if batch is not None and department is not None:
+        keys.append(("batch_department", batch, department))
+    return keys
+
+
+class CohortIndex:
+    # Percentile lookups are a binary search over a sorted array per group
+
+    def __init__(self, bin_edges=CPI_BIN_EDGES, grade_options=GRADE_SCALE.options):
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        self.grade_options = tuple(grade_options)
+        self._sorted = {}
+        self._histograms = {}
+        self._grade_counts = {}
+        # student_id -> (cpi, batch, department) currently in the index
+        self._students = {}
+
+    def __len__(self):
+        return len(self._students)
+
+    def groups(self, kind):
+        return sorted(key[1:] if len(key) > 2 else key[1] for key in self._sorted if key[0] == kind)
+
+    def _insert(self, key, values):
+        values = np.sort(values)
+        current = self._sorted.get(key)
+        if current is None:
+            self._sorted[key] = values
+            self._histograms[key] = np.histogram(values, self.bin_edges)[0]
+        else:
+            # Merge two sorted arrays without re-sorting the existing one
+            self._sorted[key] = np.insert(current, np.searchsorted(current, values), values)
+            self._histograms[key] += np.histogram(values, self.bin_edges)[0]
+
+    def _remove(self, key, values):
+        current = self._sorted[key]
+        values = np.sort(values)
+        positions = np.searchsorted(current, values)
+        # Equal values sit next to each other, so shift duplicates onto distinct slots
+        positions += np.arange(len(values)) - np.searchsorted(values, values)
+        self._sorted[key] = np.delete(current, positions)
+        self._histograms[key] -= np.histogram(values, self.bin_edges)[0]
+
+    def update_students(self, student_ids, cpis, batches=None, departments=None):
+        # Insert new students or replace the CPI of ones already indexed
+        count = len(student_ids)
+        batches = [None] * count if batches is None else list(batches)
+        departments = [None] * count if departments is None else list(departments)
+
+        removed, added = {}, {}
+        for student_id, cpi, batch, department in zip(student_ids, np.asarray(cpis, dtype=np.float64), batches, departments):
+            # Blank batch/department cells leave the student out of that grouping
+            batch = None if pd.isna(batch) else batch
+            department = None if pd.isna(department) else department
+            previous = self._students.get(student_id)
+            if previous is not None:
+                for key in _group_keys(previous[1], previous[2]):
+                    removed.setdefault(key, []).append(previous[0])
+            self._students[student_id] = (cpi, batch, department)
+            for key in _group_keys(batch, department):
+                added.setdefault(key, []).append(cpi)
+
+        for key, values in removed.items():
+            self._remove(key, np.asarray(values))
+        for key, values in added.items():
+            self._insert(key, np.asarray(values))
+
+    def add_grades(self, courses, grades):
+        # Per-course grade frequency, accumulated with one bincount per course
+        codes = pd.Index(self.grade_options).get_indexer(np.asarray(grades))
+        frame = pd.DataFrame({"course": np.asarray(courses), "code": codes})
+        frame = frame[frame["code"] >= 0]
+        for course, group in frame.groupby("course", sort=False):
+            counts = np.bincount(group["code"].to_numpy(), minlength=len(self.grade_options))
+            if course in self._grade_counts:
+                self._grade_counts[course] += counts
+            else:
+                self._grade_counts[course] = counts
+
+    def _key(self, batch, department):
+        if batch is not None and department is not None:
+            return ("batch_department", batch, department)
+        if batch is not None:
+            return ("batch", batch)
+        if department is not None:
+            return ("department", department)
+        return ALL_STUDENTS
+
+    def sorted_cpis(self, batch=None, department=None):
+        return self._sorted.get(self._key(batch, department), np.empty(0))
+
+    def percentile_rank(self, cpi, batch=None, department=None):
+        # Percentage of students in the group with a CPI at or below this one
+        values = self.sorted_cpis(batch, department)
+        if len(values) == 0:
+            return None
+        return 100.0 * np.searchsorted(values, cpi, side="right") / len(values)
+
+    def histogram(self, batch=None, department=None):
+        counts = self._histograms.get(self._key(batch, department))
+        if counts is None:
+            counts = np.zeros(len(self.bin_edges) - 1, dtype=np.int64)
+        return self.bin_edges, counts
+
+    def courses(self):
+        return sorted(self._grade_counts)
+
+    def grade_frequency(self, course):
+        counts = self._grade_counts.get(course, np.zeros(len(self.grade_options), dtype=np.int64))
+        return dict(zip(self.grade_options, counts.tolist()))
+
+
+def build_cohort_index(batches, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING, policy=None):
+    # Build from grade-sheet batches (see ingest.iter_grade_batches); CPIs use the app's weighting
+    policy = policy or scale_policy(grade_points)
+    index = CohortIndex(grade_options=tuple(policy.categories))
+    attributes = []
+
+    def observe(batches):
+        # Collect grade frequencies and group attributes as the totals stream past
+        for batch in batches:
+            if "course" in batch:
+                index.add_grades(batch["course"].to_numpy(), batch["grade"].to_numpy())
+            extra = [column for column in ("batch", "department") if column in batch]
+            if extra:
+                attributes.append(batch[["student_id", *extra]].drop_duplicates("student_id"))
+            yield batch
+
+    totals = accumulate_totals(observe(batches), rounding=rounding, policy=policy)
+    # Students with only pass/fail or audit courses have no CPI to rank
+    totals = totals[totals["credits"] > 0]
+    cpis = pd.Series(totals["cpi"].to_numpy(), index=totals["student_id"])
+    batch_of = department_of = None
+    if attributes:
+        info = pd.concat(attributes).drop_duplicates("student_id").set_index("student_id").reindex(cpis.index)
+        # Blank cells turn an integer batch column into floats; convert_dtypes keeps 2021 as 2021
+        info = info.convert_dtypes()
+        if "batch" in info:
+            batch_of = info["batch"].tolist()
+        if "department" in info:
+            department_of = info["department"].tolist()
+    index.update_students(cpis.index.tolist(), cpis.to_numpy(), batch_of, department_of)
+    return index
@@ -0,0 +1,228 @@
+"""On-disk columnar cache of final transcripts, memory-mapped for reads.
+
+Each column is a flat file of fixed-width integers, one entry per course row:
+
+  student_index.i4   int32  position in students.txt
+  semester.i2        int16
+  credits.u1         uint8
+  grade_code.i1      int8   position in the cache's grade options
+
+New semesters are appended to the column files; nothing is rewritten. The row
+count in meta.json is updated last (atomic rename), so a reader never sees a
+half-written append and a failed append is trimmed off by the next one.
+
+Usage: python columnar_cache.py append CACHE_DIR grades.csv [more sheets...]
+       python columnar_cache.py show CACHE_DIR STUDENT_ID
+"""
+
+import argparse
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+from cpi_engine import GRADE_POINTS, compute_spi_cpi_codes
+from grading_policy import DEFAULT_POLICY, scale_policy
+from rounding import DEFAULT_ROUNDING
+
+# Column name -> (file name, dtype)
+COLUMNS = {
+    "student_index": ("student_index.i4", np.int32),
+    "semester": ("semester.i2", np.int16),
+    "credits": ("credits.u1", np.uint8),
+    "grade_code": ("grade_code.i1", np.int8),
+}
+META_FILE = "meta.json"
+STUDENTS_FILE = "students.txt"
+CACHE_VERSION = 1
+
+
+def _check_range(name, values, dtype):
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"{name} values must be between {info.min} and {info.max}")
+
+
+class ColumnarCache:
+    # Appends are serialized by a lock; reads are memory maps of the committed rows
+
+    def __init__(self, path, grade_options=DEFAULT_POLICY.categories):
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        if not os.path.exists(self._file(META_FILE)):
+            self._write_meta({"version": CACHE_VERSION, "rows": 0, "students": 0, "grades": list(grade_options)})
+        self._meta_version = None
+        self._refresh()
+
+    def _file(self, name):
+        return os.path.join(self.path, name)
+
+    def _write_meta(self, meta):
+        temporary = self._file(META_FILE + ".tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary, self._file(META_FILE))
+
+    def _refresh(self):
+        # Re-read the committed state when another process has appended
+        stat = os.stat(self._file(META_FILE))
+        # meta.json is replaced on every append, so its inode changes too
+        version = (stat.st_ino, stat.st_mtime_ns)
+        if version == self._meta_version:
+            return
+        with open(self._file(META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != CACHE_VERSION:
+            raise ValueError(f"Unsupported columnar cache version: {meta.get('version')!r}")
+
+        students = []
+        if meta["students"]:
+            with open(self._file(STUDENTS_FILE), encoding="utf-8") as f:
+                students = f.read().split("\n")[:meta["students"]]
+        self._meta = meta
+        self._meta_version = version
+        self.grades = tuple(meta["grades"])
+        self.students = students
+        self._student_index = {student_id: i for i, student_id in enumerate(students)}
+        self._columns = None
+
+    def __len__(self):
+        self._refresh()
+        return self._meta["rows"]
+
+    def columns(self):
+        # Zero-copy read-only views of every committed row
+        self._refresh()
+        if self._columns is None:
+            rows = self._meta["rows"]
+            self._columns = {
+                name: np.memmap(self._file(file_name), dtype=dtype, mode="r", shape=(rows,))
+                if rows else np.empty(0, dtype=dtype)
+                for name, (file_name, dtype) in COLUMNS.items()
+            }
+        return self._columns
+
+    def append(self, student_id, semester, credits, grade):
+        # Columnar inputs as for cpi_engine.compute_spi_cpi; returns the number of rows added
+        student_id = np.asarray(student_id).astype(str)
+        semester = np.asarray(semester, dtype=np.int64)
+        credits = np.asarray(credits, dtype=np.int64)
+        _check_range("semester", semester, COLUMNS["semester"][1])
+        _check_range("credits", credits, COLUMNS["credits"][1])
+
+        with self._lock:
+            self._refresh()
+            # -1 for grades outside the cache's options
+            codes = pd.Index(self.grades).get_indexer(np.asarray(grade))
+            if (codes < 0).any():
+                unknown = sorted(set(np.asarray(grade)[codes < 0].astype(str)))
+                raise ValueError(f"Unknown grade(s): {', '.join(unknown)}")
+
+            # New students get the next indexes, in order of first appearance
+            new_students = [s for s in pd.unique(student_id) if s not in self._student_index]
+            if any("\n" in s for s in new_students):
+                raise ValueError("Student IDs cannot contain newlines")
+            lookup = {**self._student_index, **{s: len(self.students) + i for i, s in enumerate(new_students)}}
+            student_index = pd.Series(student_id).map(lookup).to_numpy(dtype=np.int64)
+            _check_range("student_index", student_index, COLUMNS["student_index"][1])
+
+            rows = self._meta["rows"]
+            values = {"student_index": student_index, "semester": semester, "credits": credits, "grade_code": codes}
+            for name, (file_name, dtype) in COLUMNS.items():
+                with open(self._file(file_name), "ab") as f:
+                    # Drop anything a failed append left past the committed rows
+                    f.truncate(rows * np.dtype(dtype).itemsize)
+                    f.write(np.ascontiguousarray(values[name], dtype=dtype).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+            with open(self._file(STUDENTS_FILE), "a", encoding="utf-8") as f:
+                f.truncate(sum(len(s.encode("utf-8")) + 1 for s in self.students))
+                f.write("".join(s + "\n" for s in new_students))
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._write_meta({**self._meta, "rows": rows + len(student_id), "students": len(self.students) + len(new_students)})
+            self._refresh()
+        return len(student_id)
+
+    def append_batches(self, batches):
+        # Grade-sheet batches as yielded by ingest.iter_grade_batches (with a semester column)
+        added = 0
+        for batch in batches:
+            if "semester" not in batch:
+                raise KeyError("Grade sheet is missing column(s): semester")
+            added += self.append(batch["student_id"], batch["semester"], batch["credits"], batch["grade"])
+        return added
+
+    def _grade_tables(self, grade_points, policy):
+        # (points, graded) per cached grade code, under the policy for this grade scale
+        return (policy or scale_policy(grade_points)).encode(np.asarray(self.grades, dtype=object))
+
+    def compute(self, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING, policy=None):
+        # SPI/CPI for every cached student, straight from the mapped columns
+        columns = self.columns()
+        points, graded = self._grade_tables(grade_points, policy)
+        result = compute_spi_cpi_codes(
+            columns["student_index"],
+            columns["semester"],
+            columns["credits"],
+            columns["grade_code"],
+            points,
+            rounding,
+            graded,
+        )
+        result["student_id"] = np.asarray(self.students, dtype=object)[result["student_id"].to_numpy()]
+        return result
+
+    def student_history(self, student_id, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING, policy=None):
+        # Per-semester SPI/CPI rows for one student; empty when the student is not cached
+        self._refresh()
+        index = self._student_index.get(str(student_id))
+        if index is None:
+            return []
+        columns = self.columns()
+        rows = np.flatnonzero(columns["student_index"] == index)
+        points, graded = self._grade_tables(grade_points, policy)
+        result = compute_spi_cpi_codes(
+            np.zeros(len(rows), dtype=np.int32),
+            columns["semester"][rows],
+            columns["credits"][rows],
+            columns["grade_code"][rows],
+            points,
+            rounding,
+            graded,
+        )
+        return result.drop(columns="student_id").to_dict("records")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    append = commands.add_parser("append", help="append grade sheets (student_id, semester, credits, grade)")
+    append.add_argument("cache_dir")
+    append.add_argument("sheets", nargs="+")
+    show = commands.add_parser("show", help="print one student's semester history")
+    show.add_argument("cache_dir")
+    show.add_argument("student_id")
+    args = parser.parse_args(argv)
+
+    cache = ColumnarCache(args.cache_dir)
+    if args.command == "append":
+        from ingest import iter_grade_batches
+
+        for sheet in args.sheets:
+            added = cache.append_batches(iter_grade_batches(sheet, optional_columns=("semester",)))
+            print(f"{sheet}: {added} rows appended")
+        print(f"{len(cache)} rows, {len(cache.students)} students in {args.cache_dir}")
+    else:
+        print(json.dumps(cache.student_history(args.student_id), indent=2, default=int))
+
+
+if __name__ == "__main__":
+    main()
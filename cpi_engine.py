@@ -0,0 +1,81 @@
+"""Headless CPI engine: SPI/CPI for whole cohorts without a Streamlit session."""
+
+import numpy as np
+import pandas as pd
+
+from grade_scale import GRADE_SCALE
+from grading_policy import scale_policy
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+GRADE_POINTS = GRADE_SCALE.points
+
+
+def compute_spi_cpi(student_id, semester, credits, grade, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING,
+                    policy=None):
+    # Columnar inputs: one entry per course row, all arrays of the same length.
+    # Sums are int64 and each SPI/CPI is one integer division with the given
+    # rounding rule (None keeps unrounded floats). Grades follow the policy
+    # (by default the scale's fail, pass/fail and audit rules); repeated
+    # courses need grading_policy.compute_with_policy.
+    points, graded = (policy or scale_policy(grade_points)).encode(grade)
+    credits = np.where(graded, np.asarray(credits, dtype=np.int64), 0)
+    return _aggregate(student_id, semester, credits, points * credits, rounding)
+
+
+def compute_spi_cpi_codes(student_index, semester, credits, grade_code, points_table, rounding=DEFAULT_ROUNDING,
+                          graded_table=None):
+    # Same as compute_spi_cpi for pre-encoded columns (e.g. memory-mapped ones):
+    # grade_code indexes into points_table, so no strings are touched.
+    # Grades that are False in graded_table add no credits.
+    grade_code = np.asarray(grade_code)
+    credits = np.asarray(credits, dtype=np.int64)
+    if graded_table is not None:
+        credits = np.where(np.asarray(graded_table, dtype=bool)[grade_code], credits, 0)
+    weighted = np.asarray(points_table, dtype=np.int64)[grade_code] * credits
+    return _aggregate(student_index, semester, credits, weighted, rounding)
+
+
+def _aggregate(student_id, semester, credits, weighted_points, rounding):
+    frame = pd.DataFrame({
+        "student_id": np.asarray(student_id),
+        "semester": np.asarray(semester),
+        "credits": credits,
+        "weighted_points": weighted_points,
+    })
+
+    # SPI: per student per semester sums
+    result = (
+        frame.groupby(["student_id", "semester"], sort=True)[["credits", "weighted_points"]]
+        .sum()
+        .reset_index()
+    )
+    result["spi"] = _divide(result["weighted_points"], result["credits"], rounding)
+
+    # CPI: running sums over each student's semesters (rows are already sorted)
+    by_student = result.groupby("student_id", sort=False)
+    result["cumulative_credits"] = by_student["credits"].cumsum()
+    result["cumulative_points"] = by_student["weighted_points"].cumsum()
+    result["cpi"] = _divide(result["cumulative_points"], result["cumulative_credits"], rounding)
+    return result
+
+
+def _divide(points, credits, rounding):
+    # NaN where there are no graded credits (e.g. a semester of pass/fail courses only)
+    points = points.to_numpy(dtype=np.int64)
+    credits = credits.to_numpy(dtype=np.int64)
+    safe = np.where(credits > 0, credits, 1)
+    values = points / safe if rounding is None else round_cpi(points, safe, rounding)
+    return np.where(credits > 0, values, np.nan)
+
+
+def compute_frame(df, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING, policy=None):
+    # Convenience wrapper for a DataFrame with student_id/semester/credits/grade columns
+    return compute_spi_cpi(
+        df["student_id"].to_numpy(),
+        df["semester"].to_numpy(),
+        df["credits"].to_numpy(),
+        df["grade"].to_numpy(),
+        grade_points,
+        rounding,
+        policy,
+    )
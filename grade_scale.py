@@ -0,0 +1,47 @@
+"""Grade scale loaded once per process, with precomputed widget options."""
+
+import json
+import os
+from types import MappingProxyType
+
+# Grade point mapping (IITK grading system)
+DEFAULT_GRADE_POINTS = {
+    "A+": 10,
+    "A": 10,
+    "B+": 9,
+    "B": 8,
+    "C+": 7,
+    "C": 6,
+    "D+": 5,
+    "D": 4
+}
+
+# Set this to a JSON file such as {"A": 10, "B": 8} to swap the grading scheme
+GRADE_SCALE_ENV = "CPI_GRADE_SCALE"
+
+
+class GradeScale:
+    # Read-only view of a grading scheme plus the lookups the widgets need
+
+    def __init__(self, grade_points):
+        if not grade_points:
+            raise ValueError("Grade scale must define at least one grade")
+        for grade, points in grade_points.items():
+            if not isinstance(points, int) or isinstance(points, bool):
+                raise ValueError(f"Grade points for {grade!r} must be an integer, got {points!r}")
+
+        self.points = MappingProxyType(dict(grade_points))
+        self.options = tuple(self.points)
+        self.index = MappingProxyType({grade: i for i, grade in enumerate(self.options)})
+        self.rows = tuple(self.points.items())
+
+
+def load_grade_scale(path=None):
+    path = path or os.environ.get(GRADE_SCALE_ENV)
+    if not path:
+        return GradeScale(DEFAULT_GRADE_POINTS)
+    with open(path, encoding="utf-8") as f:
+        return GradeScale(json.load(f))
+
+
+GRADE_SCALE = load_grade_scale()
@@ -0,0 +1,203 @@
+"""Grading policies for full transcripts: fail, pass/fail, audit and repeated courses.
+
+Policies are applied as column operations over a whole transcript frame
+(student_id, semester, course, credits, grade[, batch]); there is no per-row
+Python branching.
+"""
+
+import bisect
+
+import numpy as np
+import pandas as pd
+
+from grade_scale import GRADE_SCALE
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+REPEAT_LATEST = "latest"
+REPEAT_BEST = "best"
+
+
+class GradingPolicy:
+    # What each grade is worth and which attempts count towards the CPI
+
+    def __init__(self, name, grade_points, fail_grades=("F", "E"), pass_grades=("S",),
+                 pass_fail_fail_grades=("X",), audit_grades=("AU",), repeat=REPEAT_LATEST,
+                 rounding=DEFAULT_ROUNDING):
+        if repeat not in (REPEAT_LATEST, REPEAT_BEST):
+            raise ValueError(f"Unknown repeat rule: {repeat!r}")
+        self.name = name
+        # Fail grades are graded (0 points, credits count); the others are outside the CPI
+        self.grade_points = {**grade_points, **{grade: 0 for grade in fail_grades}}
+        self.fail_grades = tuple(fail_grades)
+        self.pass_grades = tuple(pass_grades)
+        self.pass_fail_fail_grades = tuple(pass_fail_fail_grades)
+        self.audit_grades = tuple(audit_grades)
+        self.repeat = repeat
+        self.rounding = rounding
+
+        self.categories = (
+            list(self.grade_points) + list(self.pass_grades)
+            + list(self.pass_fail_fail_grades) + list(self.audit_grades)
+        )
+        graded = len(self.grade_points)
+        passes = len(self.pass_grades)
+        # Lookup tables indexed by grade code
+        self._points = np.zeros(len(self.categories), dtype=np.int64)
+        self._points[:graded] = list(self.grade_points.values())
+        self._graded = np.zeros(len(self.categories), dtype=bool)
+        self._graded[:graded] = True
+        self._earned = self._graded & (self._points > 0)
+        self._earned[graded:graded + passes] = True
+
+    def __repr__(self):
+        return f"GradingPolicy({self.name!r}, repeat={self.repeat!r})"
+
+    def _codes(self, grades):
+        grades = np.asarray(grades)
+        # -1 for grades outside the policy; pandas is deprecating Categorical for that
+        codes = pd.Index(self.categories).get_indexer(grades)
+        if (codes < 0).any():
+            unknown = sorted(set(grades[codes < 0].astype(str)))
+            raise ValueError(f"Unknown grade(s) for policy {self.name}: {', '.join(unknown)}")
+        return codes
+
+    def encode(self, grades):
+        # (points, graded) arrays for a column of grades, for engines without course or repeat data
+        codes = self._codes(grades)
+        return self._points[codes], self._graded[codes]
+
+    def apply(self, frame):
+        # Adds points, graded, earned and superseded_at (semester a later attempt replaces this one)
+        codes = self._codes(frame["grade"].to_numpy())
+
+        result = frame.copy()
+        result["points"] = self._points[codes]
+        result["graded"] = self._graded[codes]
+        result["earned"] = self._earned[codes]
+        if "audit" in result:
+            audited = result["audit"].fillna(False).astype(bool).to_numpy()
+            result["graded"] &= ~audited
+            result["earned"] &= ~audited
+        result["superseded_at"] = self._superseded_at(result)
+        return result
+
+    def _superseded_at(self, frame):
+        # Only graded attempts take part in repeat replacement
+        graded = frame[frame["graded"]].sort_values(["student_id", "course", "semester"], kind="stable")
+        keys = [graded["student_id"], graded["course"]]
+
+        if self.repeat == REPEAT_LATEST:
+            superseded = graded.groupby(keys, sort=False)["semester"].shift(-1)
+        else:
+            # An attempt is kept if it is at least as good as every earlier one; it then
+            # stays until the next kept attempt, while weaker repeats drop out at once
+            best_before = graded.groupby(keys, sort=False)["points"].cummax().groupby(keys, sort=False).shift(1)
+            kept = best_before.isna() | (graded["points"] >= best_before)
+            kept_semester = graded["semester"].where(kept)
+            next_kept = kept_semester.groupby(keys, sort=False).shift(-1)
+            next_kept = next_kept.groupby(keys, sort=False).bfill()
+            superseded = next_kept.where(kept, graded["semester"])
+
+        return superseded.reindex(frame.index)
+
+
+DEFAULT_POLICY = GradingPolicy("default", dict(GRADE_SCALE.points))
+
+
+def scale_policy(grade_points):
+    # The default fail, pass/fail and audit rules over a grade scale
+    if dict(grade_points) == dict(GRADE_SCALE.points):
+        return DEFAULT_POLICY
+    return GradingPolicy("custom", dict(grade_points))
+
+
+# Batch year -> policy, for the first batch each policy applies to
+_BATCH_POLICIES = {0: DEFAULT_POLICY}
+
+
+def register_batch_policy(first_batch_year, policy):
+    # The policy applies to this batch year and later ones, until the next registered year
+    _BATCH_POLICIES[first_batch_year] = policy
+
+
+def policy_for_batch(batch_year):
+    years = sorted(_BATCH_POLICIES)
+    return _BATCH_POLICIES[years[max(bisect.bisect_right(years, batch_year) - 1, 0)]]
+
+
+def _divide(points, credits, rounding):
+    # rounding is one rule, or a Series of rules aligned with points
+    if isinstance(rounding, pd.Series):
+        values = np.full(len(points), np.nan)
+        # None (unrounded) reads as missing in pandas, so it gets its own mask
+        unrounded = rounding.isna().to_numpy()
+        values[unrounded] = _divide(points[unrounded], credits[unrounded], None)
+        for rule in rounding[~unrounded].unique():
+            mask = (rounding == rule).to_numpy()
+            values[mask] = _divide(points[mask], credits[mask], rule)
+        return values
+    points = points.to_numpy(dtype=np.int64)
+    credits = credits.to_numpy(dtype=np.int64)
+    safe = np.where(credits > 0, credits, 1)
+    values = points / safe if rounding is None else round_cpi(points, safe, rounding)
+    return np.where(credits > 0, values, np.nan)
+
+
+def compute_with_policy(frame, policy=None, batch_column="batch"):
+    # SPI/CPI per student per semester; with no policy given, each batch year picks its own
+    if policy is not None:
+        applied = policy.apply(frame)
+        rounding = policy.rounding
+    elif batch_column in frame:
+        parts, roundings = [], {}
+        for year, part in frame.groupby(batch_column, sort=False, dropna=False):
+            # Students with a blank batch cell fall back to the default policy
+            batch_policy = DEFAULT_POLICY if pd.isna(year) else policy_for_batch(year)
+            parts.append(batch_policy.apply(part))
+            roundings.update(dict.fromkeys(part["student_id"].unique(), batch_policy.rounding))
+        applied = pd.concat(parts)
+        # Each student's CPI is rounded by the rule of their own batch's policy
+        rounding = pd.Series(roundings, dtype=object)
+    else:
+        applied = DEFAULT_POLICY.apply(frame)
+        rounding = DEFAULT_POLICY.rounding
+
+    applied["credits"] = applied["credits"].astype("int64")
+    graded_credits = applied["credits"].where(applied["graded"], 0)
+    weighted = applied["points"] * graded_credits
+
+    # SPI counts every graded attempt of that semester
+    per_semester = pd.DataFrame({
+        "student_id": applied["student_id"],
+        "semester": applied["semester"],
+        "credits": graded_credits,
+        "weighted_points": weighted,
+        "earned_credits": applied["credits"].where(applied["earned"], 0),
+    }).groupby(["student_id", "semester"], sort=True).sum().reset_index()
+    if isinstance(rounding, pd.Series):
+        rounding = per_semester["student_id"].map(rounding)
+    per_semester["spi"] = _divide(per_semester["weighted_points"], per_semester["credits"], rounding)
+
+    # CPI: each attempt adds its credits when taken and removes them when superseded
+    superseded = applied["superseded_at"].notna() & applied["graded"]
+    deltas = pd.concat([
+        pd.DataFrame({
+            "student_id": applied["student_id"],
+            "semester": applied["semester"],
+            "delta_credits": graded_credits,
+            "delta_points": weighted,
+        }),
+        pd.DataFrame({
+            "student_id": applied["student_id"][superseded],
+            "semester": applied["superseded_at"][superseded].astype(applied["semester"].dtype),
+            "delta_credits": -graded_credits[superseded],
+            "delta_points": -weighted[superseded],
+        }),
+    ]).groupby(["student_id", "semester"], sort=True).sum()
+
+    result = per_semester.join(deltas, on=["student_id", "semester"])
+    by_student = result.groupby("student_id", sort=False)
+    result["cumulative_credits"] = by_student["delta_credits"].cumsum()
+    result["cumulative_points"] = by_student["delta_points"].cumsum()
+    result["cpi"] = _divide(result["cumulative_points"], result["cumulative_credits"], rounding)
+    return result.drop(columns=["delta_credits", "delta_points"])
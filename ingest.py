@@ -0,0 +1,95 @@
+"""Streaming grade-sheet ingestion: CSV/Parquet exports in fixed-size batches."""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from cpi_engine import GRADE_POINTS
+from grading_policy import scale_policy
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+GRADE_SHEET_COLUMNS = ["student_id", "credits", "grade"]
+DEFAULT_BATCH_SIZE = 100_000
+
+
+def _is_parquet(source, file_format=None):
+    if file_format is not None:
+        return file_format == "parquet"
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    return str(name).lower().endswith((".parquet", ".pq"))
+
+
+def _check_columns(names):
+    missing = set(GRADE_SHEET_COLUMNS) - set(names)
+    if missing:
+        raise KeyError(f"Grade sheet is missing column(s): {', '.join(sorted(missing))}")
+
+
+def iter_grade_batches(source, batch_size=DEFAULT_BATCH_SIZE, file_format=None, optional_columns=()):
+    # Yield DataFrames of at most batch_size rows; never loads the whole file.
+    # optional_columns are read as well when the sheet has them.
+    wanted = set(GRADE_SHEET_COLUMNS) | set(optional_columns)
+    if _is_parquet(source, file_format):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise ImportError("Reading Parquet grade sheets requires pyarrow") from exc
+
+        parquet_file = pq.ParquetFile(source)
+        _check_columns(parquet_file.schema_arrow.names)
+        columns = [name for name in parquet_file.schema_arrow.names if name in wanted]
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # A callable usecols skips pandas' own missing-column check, so check each chunk
+        for batch in pd.read_csv(
+            source,
+            usecols=lambda name: name in wanted,
+            dtype={"grade": str},
+            chunksize=batch_size,
+        ):
+            _check_columns(batch.columns)
+            yield batch
+
+
+def accumulate_totals(batches, grade_points=GRADE_POINTS, rounding=DEFAULT_ROUNDING, policy=None):
+    # Running per-student int64 sums of (grade_points x credits) and graded credits;
+    # fail grades count with 0 points, pass/fail and audit grades add no credits
+    policy = policy or scale_policy(grade_points)
+    total_points = pd.Series(dtype="int64")
+    total_credits = pd.Series(dtype="int64")
+
+    for batch in batches:
+        points, graded = policy.encode(batch["grade"].to_numpy())
+        credits = np.where(graded, batch["credits"].to_numpy(dtype="int64"), 0)
+        weighted = points * credits
+        grouped = pd.DataFrame({
+            "student_id": batch["student_id"].to_numpy(),
+            "credits": credits,
+            "weighted_points": weighted,
+        }).groupby("student_id", sort=False).sum()
+
+        # fill_value upcasts to float64, so cast back to keep the sums exact
+        total_points = total_points.add(grouped["weighted_points"], fill_value=0).astype("int64")
+        total_credits = total_credits.add(grouped["credits"], fill_value=0).astype("int64")
+
+    result = pd.DataFrame({
+        "credits": total_credits,
+        "weighted_points": total_points,
+    })
+    result.index.name = "student_id"
+    # Students with no graded credits get a NaN CPI
+    credits = result["credits"].to_numpy()
+    safe = np.where(credits > 0, credits, 1)
+    if rounding is None:
+        cpi = result["weighted_points"].to_numpy() / safe
+    else:
+        cpi = round_cpi(result["weighted_points"].to_numpy(), safe, rounding)
+    result["cpi"] = np.where(credits > 0, cpi, np.nan)
+    return result.sort_index().reset_index()
+
+
+def ingest_grade_sheet(source, batch_size=DEFAULT_BATCH_SIZE, file_format=None, grade_points=GRADE_POINTS,
+                       rounding=DEFAULT_ROUNDING, policy=None):
+    return accumulate_totals(iter_grade_batches(source, batch_size, file_format), grade_points, rounding, policy)
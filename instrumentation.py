@@ -0,0 +1,140 @@
+"""Per-rerun timing spans for the app, with JSON lines and Prometheus export.
+
+A rerun is timed as consecutive named sections (section() closes the previous
+one) plus optional nested spans (span() as a context manager). The profiler is
+thread-local, matching Streamlit's one script thread per session, so helpers
+can add spans without being handed a profiler.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# When set, every finished rerun is appended to this file as one JSON line
+METRICS_PATH_ENV = "CPI_METRICS_PATH"
+PROCESS_HISTORY = 1000
+QUANTILES = (0.5, 0.95, 0.99)
+
+_local = threading.local()
+_history = deque(maxlen=PROCESS_HISTORY)
+_history_lock = threading.Lock()
+
+
+class RerunProfiler:
+    # Timings for one script run; spans with the same name are summed
+
+    def __init__(self, mode=None):
+        self.mode = mode
+        self.started = time.perf_counter()
+        self.spans = []
+        self._section = None
+
+    def section(self, name):
+        now = time.perf_counter()
+        if self._section is not None:
+            self.spans.append((self._section[0], now - self._section[1]))
+        self._section = (name, now) if name else None
+
+    @contextmanager
+    def span(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.spans.append((name, time.perf_counter() - started))
+
+    def finish(self):
+        self.section(None)
+        spans = {}
+        for name, seconds in self.spans:
+            spans[name] = spans.get(name, 0.0) + seconds
+        return {
+            "timestamp": time.time(),
+            "mode": self.mode,
+            "total": time.perf_counter() - self.started,
+            "spans": spans,
+        }
+
+
+def start_rerun(mode=None):
+    _local.profiler = RerunProfiler(mode)
+    return _local.profiler
+
+
+def current():
+    return getattr(_local, "profiler", None)
+
+
+def section(name):
+    profiler = current()
+    if profiler is not None:
+        profiler.section(name)
+
+
+@contextmanager
+def span(name):
+    profiler = current()
+    if profiler is None:
+        yield
+    else:
+        with profiler.span(name):
+            yield
+
+
+def finish_rerun(mode=None):
+    # Close the active profiler, keep the record process-wide and return it
+    profiler = current()
+    if profiler is None:
+        return None
+    _local.profiler = None
+    if mode is not None:
+        profiler.mode = mode
+    record = profiler.finish()
+
+    with _history_lock:
+        _history.append(record)
+        path = os.environ.get(METRICS_PATH_ENV)
+        if path:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+    return record
+
+
+def history():
+    with _history_lock:
+        return list(_history)
+
+
+def to_json_lines(records):
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def _quantile(sorted_values, q):
+    # Nearest-rank quantile
+    return sorted_values[max(math.ceil(q * len(sorted_values)) - 1, 0)]
+
+
+def to_prometheus(records):
+    # Summaries in the Prometheus text exposition format
+    samples = {}
+    for record in records:
+        samples.setdefault("total", []).append(record["total"])
+        for name, seconds in record["spans"].items():
+            samples.setdefault(name, []).append(seconds)
+
+    lines = [
+        "# HELP cpi_app_rerun_seconds Wall time of app reruns and their named spans.",
+        "# TYPE cpi_app_rerun_seconds summary",
+    ]
+    for name in sorted(samples):
+        values = sorted(samples[name])
+        label = name.replace("\\", "\\\\").replace('"', '\\"')
+        for q in QUANTILES:
+            lines.append(f'cpi_app_rerun_seconds{{span="{label}",quantile="{q}"}} {_quantile(values, q):.6f}')
+        lines.append(f'cpi_app_rerun_seconds_sum{{span="{label}"}} {sum(values):.6f}')
+        lines.append(f'cpi_app_rerun_seconds_count{{span="{label}"}} {len(values)}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,180 @@
+"""Load test: many randomized calculator sessions driven headlessly through AppTest.
+
+Each session picks a calculator mode, enters 5-20 courses (capped at the mode's
+maximum) and clicks Calculate/Breakdown a few times. Sessions run in parallel
+worker processes; every script run is timed and each worker's resident memory
+is sampled around every session. Prints JSON with throughput, latency
+percentiles and memory growth.
+
+Usage: python loadtest.py [--sessions 200] [--processes 4] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from benchmark import APP_PATH, MODES
+from grade_scale import GRADE_SCALE
+
+PERCENTILES = (50, 90, 95, 99)
+ACTIONS = ("calculate", "breakdown")
+
+
+def _rss_bytes():
+    # Current resident set size; falls back to the peak where /proc is unavailable
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _percentiles(values):
+    if not values:
+        return {}
+    values = sorted(values)
+    return {f"p{p}_ms": values[min(len(values) - 1, len(values) * p // 100)] * 1000 for p in PERCENTILES}
+
+
+def _button(at, label):
+    return next(button for button in at.main.button if label in button.label)
+
+
+def _fill_entries(at, mode, count, rng):
+    grades = GRADE_SCALE.options
+    for i in range(count):
+        if mode == "single":
+            at.text_input(key=f"name_{i}").input(f"Course {i + 1}")
+            at.number_input(key=f"credit_{i}").set_value(rng.randint(1, 10))
+            at.selectbox(key=f"grade_{i}").set_value(rng.choice(grades))
+        elif mode == "overall":
+            at.number_input(key=f"sem_cpi_{i}").set_value(round(rng.uniform(5.0, 10.0), 2))
+            at.number_input(key=f"sem_credits_{i}").set_value(rng.randint(20, 50))
+        else:
+            at.number_input(key=f"quick_credit_{i}").set_value(rng.randint(1, 10))
+            at.selectbox(key=f"quick_grade_{i}").set_value(rng.choice(grades))
+
+
+def run_session(session_id, seed, timeout=60):
+    # One simulated user; returns per-run latencies, errors and RSS growth
+    from streamlit.testing.v1 import AppTest
+
+    rng = random.Random(seed * 1_000_003 + session_id)
+    mode = rng.choice(list(MODES))
+    label, limit = MODES[mode]
+    count = min(rng.randint(5, 20), limit)
+    clicks = [rng.choice(ACTIONS) for _ in range(rng.randint(1, 4))]
+    runs = []
+
+    def timed(action, step):
+        started = time.perf_counter()
+        step()
+        runs.append((action, time.perf_counter() - started))
+
+    rss_before = _rss_bytes()
+    started = time.perf_counter()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    timed("load", at.run)
+    timed("select_mode", lambda: at.sidebar.radio[0].set_value(label).run())
+    timed("set_count", lambda: at.sidebar.number_input[0].set_value(count).run())
+    _fill_entries(at, mode, count, rng)
+    timed("enter_courses", at.run)
+    for action in clicks:
+        button = "Calculate" if action == "calculate" else "Breakdown"
+        timed(action, lambda: _button(at, button).click().run())
+    elapsed = time.perf_counter() - started
+
+    errors = [exception.message for exception in at.exception]
+    del at
+    return {
+        "session": session_id,
+        "mode": mode,
+        "courses": count,
+        "runs": runs,
+        "seconds": elapsed,
+        "errors": errors,
+        "rss_growth_bytes": _rss_bytes() - rss_before,
+        "pid": os.getpid(),
+    }
+
+
+def _run_sessions(session_ids, seed, timeout):
+    results = [run_session(session_id, seed, timeout) for session_id in session_ids]
+    # The first session of a worker pays for imports and caches, not per-session state
+    for i, session in enumerate(results):
+        session["warmup"] = i == 0
+    return results
+
+
+def run_load_test(sessions, processes, seed=0, timeout=60):
+    processes = max(1, min(processes, sessions))
+    chunks = [list(range(i, sessions, processes)) for i in range(processes)]
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        futures = [pool.submit(_run_sessions, chunk, seed, timeout) for chunk in chunks]
+        results = [session for future in futures for session in future.result()]
+    wall = time.perf_counter() - started
+
+    latencies = {}
+    for session in results:
+        for action, seconds in session["runs"]:
+            latencies.setdefault(action, []).append(seconds)
+    all_runs = [seconds for values in latencies.values() for seconds in values]
+    growth = [session["rss_growth_bytes"] for session in results if not session["warmup"]]
+    per_process = {}
+    for session in results:
+        per_process[session["pid"]] = per_process.get(session["pid"], 0) + session["rss_growth_bytes"]
+
+    return {
+        "sessions": len(results),
+        "processes": processes,
+        "wall_s": wall,
+        "sessions_per_s": len(results) / wall,
+        "runs_per_s": len(all_runs) / wall,
+        "failed_sessions": sum(1 for session in results if session["errors"]),
+        "errors": sorted({error for session in results for error in session["errors"]})[:10],
+        "modes": {mode: sum(1 for session in results if session["mode"] == mode) for mode in MODES},
+        "latency": {"all": {"runs": len(all_runs), **_percentiles(all_runs)}, **{
+            action: {"runs": len(values), **_percentiles(values)} for action, values in sorted(latencies.items())
+        }},
+        "session_latency": _percentiles([session["seconds"] for session in results]),
+        "memory": {
+            # Growth of a worker's RSS across one session after warm-up; steady growth points at per-session leaks
+            "session_growth_mean_kb": sum(growth) / len(growth) / 1024 if growth else 0,
+            "session_growth_max_kb": max(growth) / 1024 if growth else 0,
+            "process_growth_kb": {str(pid): total / 1024 for pid, total in per_process.items()},
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per script run")
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **run_load_test(args.sessions, args.processes, args.seed, args.timeout),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""What-if planner: cheapest grade combinations that reach a target overall CPI."""
+
+import bisect
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from grade_scale import GRADE_SCALE
+
+# Below this many raw combinations the search runs inline; pool start-up would dominate
+INLINE_SEARCH_SPACE = 50_000
+SPLIT_DEPTH = 2
+DEADLINE_CHECK_INTERVAL = 4096
+
+# Pools by worker count, shared by every session of the app; see _get_pool
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def grade_levels(grade_points=GRADE_SCALE.points):
+    # Distinct grade point values, best first; equal values keep the lower-ranked letter
+    letters = {}
+    for grade, points in grade_points.items():
+        letters[points] = grade
+    values = sorted(letters, reverse=True)
+    return values, [letters[value] for value in values]
+
+
+def _get_pool(workers):
+    # Sessions run on server threads, so creation is locked and workers are spawned
+    # rather than forked; a pool is never shut down under another session's search
+    with _pools_lock:
+        pool = _pools.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pools[workers] = pool
+        return pool
+
+
+class _Search:
+    # Depth-first branch and bound over courses sorted by credits (largest first)
+
+    def __init__(self, credits, values, needed, max_results, deadline):
+        self.credits = credits
+        self.values = values
+        self.needed = needed
+        self.max_results = max_results
+        self.deadline = deadline
+        self.results = []  # sorted (cost, levels) pairs, cheapest first
+        self.nodes = 0
+        self.complete = True
+
+        self.suffix_credits = [0] * (len(credits) + 1)
+        for i in range(len(credits) - 1, -1, -1):
+            self.suffix_credits[i] = self.suffix_credits[i + 1] + credits[i]
+
+    def _record(self, levels, counts):
+        cost = tuple(counts)
+        if len(self.results) == self.max_results:
+            if cost >= self.results[-1][0]:
+                return
+            self.results.pop()
+        bisect.insort(self.results, (cost, tuple(levels)))
+
+    def run(self, prefix):
+        points = sum(self.values[level] * credit for level, credit in zip(prefix, self.credits))
+        counts = [0] * len(self.values)
+        for level in prefix:
+            counts[level] += 1
+        self._visit(len(prefix), points, list(prefix), counts)
+
+    def _visit(self, index, points, levels, counts):
+        self.nodes += 1
+        if self.nodes % DEADLINE_CHECK_INTERVAL == 0 and time.monotonic() > self.deadline:
+            self.complete = False
+        if not self.complete:
+            return
+
+        remaining = self.suffix_credits[index]
+        # Even top grades everywhere cannot reach the target
+        if points + self.values[0] * remaining < self.needed:
+            return
+
+        lowest = len(self.values) - 1
+        left = len(self.credits) - index
+        # Cheapest possible completion already costs more than the worst kept plan
+        if len(self.results) == self.max_results:
+            bound = counts[:lowest] + [counts[lowest] + left]
+            if tuple(bound) >= self.results[-1][0]:
+                return
+
+        if left == 0:
+            self._record(levels, counts)
+            return
+
+        # Courses with equal credits are interchangeable, so keep their levels ordered
+        start = 0
+        if index > 0 and self.credits[index] == self.credits[index - 1]:
+            start = levels[-1]
+        credit = self.credits[index]
+        for level in range(lowest, start - 1, -1):
+            counts[level] += 1
+            levels.append(level)
+            self._visit(index + 1, points + self.values[level] * credit, levels, counts)
+            levels.pop()
+            counts[level] -= 1
+
+
+def _search_prefixes(credits, values, needed, max_results, deadline, prefixes):
+    search = _Search(credits, values, needed, max_results, deadline)
+    for prefix in prefixes:
+        search.run(prefix)
+    return search.results, search.complete
+
+
+def _split_prefixes(credits, levels, depth):
+    # All symmetric-distinct level choices for the first `depth` courses
+    prefixes = [()]
+    for index in range(min(depth, len(credits))):
+        expanded = []
+        for prefix in prefixes:
+            start = prefix[-1] if index > 0 and credits[index] == credits[index - 1] else 0
+            expanded.extend(prefix + (level,) for level in range(start, levels))
+        prefixes = expanded
+    return prefixes
+
+
+def plan_target_cpi(current_cpi, current_credits, remaining_credits, target_cpi,
+                    grade_points=GRADE_SCALE.points, max_results=5, time_budget=2.0, workers=None):
+    # Returns {'plans': [...], 'complete': bool}; each plan lists grades in input order.
+    # Plans are the max_results cheapest feasible ones, cheapest first: fewest top
+    # grades, then fewest of the next grade, and so on.
+    values, letters = grade_levels(grade_points)
+    total_credits = current_credits + sum(remaining_credits)
+    # Integer hundredths, so a plan that lands exactly on the target is not lost to float error
+    current_weighted = round(current_cpi * 100) * current_credits
+    needed = round(target_cpi * 100) * total_credits - current_weighted
+    scaled = [value * 100 for value in values]
+
+    order = sorted(range(len(remaining_credits)), key=lambda i: -remaining_credits[i])
+    credits = [remaining_credits[i] for i in order]
+    deadline = time.monotonic() + time_budget
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(values) ** len(credits) <= INLINE_SEARCH_SPACE:
+        results, complete = _search_prefixes(credits, scaled, needed, max_results, deadline, [()])
+    else:
+        prefixes = _split_prefixes(credits, len(values), SPLIT_DEPTH)
+        chunks = [prefixes[i::workers] for i in range(workers)]
+        pool = _get_pool(workers)
+        futures = [
+            pool.submit(_search_prefixes, credits, scaled, needed, max_results, deadline, chunk)
+            for chunk in chunks if chunk
+        ]
+        results, complete = [], True
+        for future in futures:
+            chunk_results, chunk_complete = future.result()
+            results.extend(chunk_results)
+            complete = complete and chunk_complete
+        results = sorted(results)[:max_results]
+
+    plans = []
+    for cost, levels in results:
+        grades = [None] * len(levels)
+        weighted = current_weighted
+        for position, level in zip(order, levels):
+            grades[position] = letters[level]
+            weighted += scaled[level] * remaining_credits[position]
+        plans.append({
+            "grades": grades,
+            "cpi": weighted / 100 / total_credits if total_credits > 0 else 0,
+            "high_grades": cost[0],
+        })
+    return {"plans": plans, "complete": complete}
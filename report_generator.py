@@ -0,0 +1,247 @@
+"""Bulk grade-card reports: the Detailed Breakdown view as static HTML or PDF files.
+
+Reads a grade sheet (CSV/Parquet with student_id, credits, grade and optionally
+course and semester) in batches and renders one card per student, or per
+student and semester when the sheet has a semester column. Rows of a student
+must be contiguous in the sheet, as in registry exports sorted by student; their
+semesters may be in any order.
+
+Cards are rendered on a process pool; each worker compiles the template once,
+and only a bounded number of chunks is in flight so memory stays flat for any
+cohort size. PDF output needs weasyprint.
+
+Usage: python report_generator.py grades.csv [--output-dir reports] [--format html|pdf]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from cpi_engine import GRADE_POINTS
+from grading_policy import scale_policy
+from ingest import DEFAULT_BATCH_SIZE, iter_grade_batches
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+FORMATS = ("html", "pdf")
+DEFAULT_CHUNK_SIZE = 200
+
+CARD_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Grade Card - {{ student_id }}</title>
+<style>
+  body { font-family: sans-serif; margin: 2em; color: #222; }
+  h1 { font-size: 1.4em; margin-bottom: 0; }
+  h2 { font-size: 1.1em; color: #555; margin-top: 0.2em; }
+  table { border-collapse: collapse; width: 100%; margin: 1em 0; }
+  th, td { border: 1px solid #ccc; padding: 0.35em 0.6em; }
+  th { background: #f2f2f2; text-align: left; }
+  td.num { text-align: right; }
+  .totals td { font-weight: bold; }
+  .formula { font-family: monospace; margin-top: 1em; }
+  footer { color: gray; font-size: 0.8em; margin-top: 2em; text-align: center; }
+</style>
+</head>
+<body>
+<h1>🎓 IIT Kanpur Grade Card</h1>
+<h2>Student {{ student_id }}{% if semester is not none %} - Semester {{ semester }}{% endif %}</h2>
+<table>
+  <tr>{% for column in columns %}<th>{{ column }}</th>{% endfor %}</tr>
+  {% for row in rows %}
+  <tr>{% for value in row %}<td{% if value is number %} class="num"{% endif %}>{{ value }}</td>{% endfor %}</tr>
+  {% endfor %}
+</table>
+<table class="totals">
+  <tr><th>Total Credits</th><th>Total Grade Points</th><th>Final CPI</th></tr>
+  <tr><td class="num">{{ total_credits }}</td><td class="num">{{ "%.1f"|format(total_points) }}</td><td class="num">{{ "%.2f"|format(cpi) }}</td></tr>
+</table>
+<p class="formula">CPI = &Sigma;(Grade Points &times; Credits) &divide; &Sigma; Credits</p>
+<p class="formula">CPI = {{ "%.1f"|format(total_points) }} &divide; {{ total_credits }} = <strong>{{ "%.2f"|format(cpi) }}</strong></p>
+<footer>IIT Kanpur CPI Calculator | follows the standard IITK grading system</footer>
+</body>
+</html>
+"""
+
+# Per-worker state, set once by _init_worker
+_template = None
+_worker_options = None
+
+
+def _require_pdf():
+    try:
+        import weasyprint
+    except ImportError as exc:
+        raise ImportError("PDF grade cards require weasyprint (pip install weasyprint)") from exc
+    return weasyprint
+
+
+def _init_worker(output_dir, file_format, rounding, policy):
+    global _template, _worker_options
+    try:
+        import jinja2
+    except ImportError as exc:
+        raise ImportError("Grade card templates require jinja2") from exc
+
+    _template = jinja2.Environment(autoescape=True).from_string(CARD_TEMPLATE)
+    _worker_options = {"output_dir": output_dir, "file_format": file_format, "rounding": rounding, "policy": policy}
+    if file_format == "pdf":
+        _worker_options["weasyprint"] = _require_pdf()
+
+
+def card_filename(student_id, semester=None):
+    name = re.sub(r"[^\w.-]", "_", str(student_id))
+    return name if semester is None else f"{name}_sem{semester}"
+
+
+def render_card(student_id, semester, rows, rounding=DEFAULT_ROUNDING, template=None, policy=None):
+    # Same table, totals and formula as the app's Detailed Breakdown; pass/fail
+    # and audit courses are listed without grade points and add no credits
+    names, credits, grades = zip(*rows)
+    points, graded = (policy or scale_policy(GRADE_POINTS)).encode(list(grades))
+    columns = {"Course": [], "Credits": [], "Grade": [], "Grade Points": [], "Weighted Points": []}
+    total_credits = total_points = 0
+    courses = zip(names, credits, grades, points.tolist(), graded.tolist())
+    for i, (name, credit, grade, point, counted) in enumerate(courses):
+        columns["Course"].append(name or f"Course {i+1}")
+        columns["Credits"].append(credit)
+        columns["Grade"].append(grade)
+        columns["Grade Points"].append(point if counted else "-")
+        columns["Weighted Points"].append(point * credit if counted else "-")
+        if counted:
+            total_credits += credit
+            total_points += point * credit
+    cpi = round_cpi(total_points, total_credits, rounding) if total_credits > 0 else 0
+
+    return (template or _template).render(
+        student_id=student_id,
+        semester=semester,
+        columns=list(columns),
+        rows=list(zip(*columns.values())),
+        total_credits=total_credits,
+        total_points=total_points,
+        cpi=cpi,
+    )
+
+
+def _render_chunk(cards):
+    # Runs in a worker: render and write a list of (student_id, semester, rows)
+    output_dir = _worker_options["output_dir"]
+    file_format = _worker_options["file_format"]
+    for student_id, semester, rows in cards:
+        html = render_card(student_id, semester, rows, _worker_options["rounding"], policy=_worker_options["policy"])
+        path = os.path.join(output_dir, f"{card_filename(student_id, semester)}.{file_format}")
+        if file_format == "pdf":
+            _worker_options["weasyprint"].HTML(string=html).write_pdf(path)
+        else:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+    return len(cards)
+
+
+def _student_cards(student_id, rows):
+    # One card per semester of a student, in order of first appearance; rows are (semester, course row)
+    by_semester = {}
+    for sem, row in rows:
+        by_semester.setdefault(sem, []).append(row)
+    for sem, course_rows in by_semester.items():
+        yield student_id, sem, course_rows
+
+
+def iter_cards(batches, grade_points=GRADE_POINTS, semester=None, policy=None):
+    # (student_id, semester, [(course, credits, grade), ...]) per card, streamed across batches.
+    # A student's rows must be contiguous; their semesters may come in any order.
+    policy = policy or scale_policy(grade_points)
+    done = set()
+    pending_student, pending_rows = None, []
+
+    for batch in batches:
+        # Reject unknown grades for the whole batch before any card is built
+        policy.encode(batch["grade"].to_numpy())
+        if semester is not None and "semester" in batch:
+            batch = batch[batch["semester"] == semester]
+        semesters = batch["semester"].tolist() if "semester" in batch else [None] * len(batch)
+        courses = batch["course"].tolist() if "course" in batch else [""] * len(batch)
+
+        students = batch["student_id"].tolist()
+        rows = zip(students, semesters, courses, batch["credits"].tolist(), batch["grade"].tolist())
+        for student_id, sem, course, credit, grade in rows:
+            if student_id != pending_student:
+                if pending_rows:
+                    done.add(pending_student)
+                    yield from _student_cards(pending_student, pending_rows)
+                if student_id in done:
+                    raise ValueError(f"Rows for student {student_id} are not contiguous in the grade sheet")
+                pending_student, pending_rows = student_id, []
+            pending_rows.append((sem, ("" if course != course else str(course), int(credit), grade)))
+
+    if pending_rows:
+        yield from _student_cards(pending_student, pending_rows)
+
+
+def generate_reports(source, output_dir, file_format="html", workers=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                     batch_size=DEFAULT_BATCH_SIZE, semester=None, rounding=DEFAULT_ROUNDING, policy=None):
+    # Returns {'cards': n, 'seconds': elapsed, 'output_dir': ...}
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown report format: {file_format!r}")
+    if file_format == "pdf":
+        # Fail here with a clear message rather than as a broken worker pool
+        _require_pdf()
+    os.makedirs(output_dir, exist_ok=True)
+    policy = policy or scale_policy(GRADE_POINTS)
+
+    started = time.perf_counter()
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = 2 * workers
+    batches = iter_grade_batches(source, batch_size, optional_columns=("course", "semester"))
+
+    rendered = 0
+    in_flight = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(output_dir, file_format, rounding, policy)) as pool:
+        chunk = []
+        for card in iter_cards(batches, semester=semester, policy=policy):
+            chunk.append(card)
+            if len(chunk) < chunk_size:
+                continue
+            # Wait for a worker before reading further so memory stays bounded
+            if len(in_flight) >= max_in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                rendered += sum(future.result() for future in finished)
+            in_flight.add(pool.submit(_render_chunk, chunk))
+            chunk = []
+        if chunk:
+            in_flight.add(pool.submit(_render_chunk, chunk))
+        rendered += sum(future.result() for future in wait(in_flight).done)
+
+    return {"cards": rendered, "seconds": time.perf_counter() - started, "output_dir": output_dir}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="grade sheet (CSV or Parquet)")
+    parser.add_argument("--output-dir", default="reports")
+    parser.add_argument("--format", choices=FORMATS, default="html", dest="file_format")
+    parser.add_argument("--semester", type=int, help="only render cards for this semester")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="cards per worker task")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="grade sheet rows read at a time")
+    args = parser.parse_args(argv)
+
+    summary = generate_reports(
+        args.source,
+        args.output_dir,
+        file_format=args.file_format,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        batch_size=args.batch_size,
+        semester=args.semester,
+    )
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Process-wide LRU cache of calculator results, shared by every session.
+
+Summaries (credits, points, CPI) depend only on the multiset of course
+contributions, so they are keyed by a canonical hash of that multiset: the same
+courses entered in any order, by any user, hit the same entry. Breakdown tables
+show names and entry order, so callers key those by the ordered rows instead.
+"""
+
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+
+from rounding import DEFAULT_ROUNDING, round_cpi
+
+DEFAULT_MAX_ENTRIES = 4096
+
+
+def fingerprint(contributions, *extra):
+    # Canonical hash of a multiset of (credits, weighted_points) pairs plus any
+    # settings that change the result (scale, rounding rule)
+    counts = sorted(Counter((int(c), int(w)) for c, w in contributions).items())
+    return hashlib.blake2b(repr((counts, extra)).encode(), digest_size=16).hexdigest()
+
+
+def summarize(contributions, scale=1, rounding=DEFAULT_ROUNDING):
+    # Totals in the same units as CPIAccumulator: weighted points are in 1/scale
+    credits = sum(c for c, _ in contributions)
+    weighted_points = sum(w for _, w in contributions)
+    return {
+        "credits": credits,
+        "weighted_points": weighted_points,
+        "total_points": weighted_points / scale if scale != 1 else weighted_points,
+        "cpi": round_cpi(weighted_points, credits * scale, rounding) if credits > 0 else 0,
+    }
+
+
+class ResultCache:
+    # Least recently used entries are evicted once max_entries is reached
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Computed outside the lock; two sessions racing on one key both compute, harmlessly
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def summary(self, contributions, scale=1, rounding=DEFAULT_ROUNDING):
+        contributions = list(contributions)
+        key = ("summary", fingerprint(contributions, scale, rounding))
+        return self.get_or_compute(key, lambda: summarize(contributions, scale, rounding))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
@@ -0,0 +1,17 @@
+"""Deterministic CPI rounding from integer totals (no floating-point accumulation)."""
+
+# Reported CPIs have two decimals; half-up rounding unless configured otherwise
+ROUND_HALF_UP = "round_half_up"
+TRUNCATE = "truncate"
+DEFAULT_ROUNDING = ROUND_HALF_UP
+
+
+def round_cpi(points, credits, rule=DEFAULT_ROUNDING):
+    # Works on Python ints and numpy int64 arrays alike: integer maths, one division at the end
+    if rule == ROUND_HALF_UP:
+        hundredths = (200 * points + credits) // (2 * credits)
+    elif rule == TRUNCATE:
+        hundredths = (100 * points) // credits
+    else:
+        raise ValueError(f"Unknown rounding rule: {rule!r}")
+    return hundredths / 100
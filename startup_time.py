@@ -0,0 +1,124 @@
+"""Cold-start measurements for the app; prints JSON results.
+
+Each sample runs in a fresh Python process, like a newly started container:
+  import       - importing app.py (Streamlit plus our modules)
+  first_render - import plus the first headless run of main() via AppTest
+  server_ready - `streamlit run app.py` until /_stcore/health answers
+
+Usage: python startup_time.py [--runs 5] [--skip-server] [--output results.json]
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY_MODULES = ("pandas", "numpy", "pyarrow")
+
+IMPORT_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+import app
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+FIRST_RENDER_SNIPPET = """
+import json, sys, time
+started = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file("app.py", default_timeout=60)
+at.run()
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def _run_snippet(snippet):
+    output = subprocess.run(
+        [sys.executable, "-c", snippet],
+        cwd=APP_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_ready(timeout):
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "app.py",
+         "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false"],
+        cwd=APP_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return {"seconds": time.perf_counter() - started}
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.05)
+        raise TimeoutError(f"Streamlit server did not become healthy within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _summarise(samples):
+    times = [sample["seconds"] for sample in samples]
+    result = {
+        "runs": len(times),
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "max_s": max(times),
+    }
+    if "loaded" in samples[0]:
+        result["heavy_modules_loaded"] = samples[0]["loaded"]
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-server", action="store_true", help="skip the streamlit server measurement")
+    parser.add_argument("--server-timeout", type=float, default=60.0)
+    parser.add_argument("--output", help="write JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        "python": sys.version.split()[0],
+        "import": _summarise([_run_snippet(IMPORT_SNIPPET) for _ in range(args.runs)]),
+        "first_render": _summarise([_run_snippet(FIRST_RENDER_SNIPPET) for _ in range(args.runs)]),
+    }
+    if not args.skip_server:
+        report["server_ready"] = _summarise([_server_ready(args.server_timeout) for _ in range(args.runs)])
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
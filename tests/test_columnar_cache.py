@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pytest
+
+from columnar_cache import COLUMNS, ColumnarCache
+
+
+def _file_rows(cache, name):
+    file_name, dtype = COLUMNS[name]
+    return os.path.getsize(os.path.join(cache.path, file_name)) // np.dtype(dtype).itemsize
+
+
+def test_append_and_read_back(tmp_path):
+    cache = ColumnarCache(str(tmp_path))
+    assert cache.append(["s1", "s1", "s2"], [1, 1, 1], [9, 6, 9], ["A", "B", "C"]) == 3
+    assert cache.append(["s2", "s3"], [2, 1], [3, 4], ["S", "F"]) == 2
+
+    assert len(cache) == 5
+    assert cache.students == ["s1", "s2", "s3"]
+    assert cache.columns()["student_index"].tolist() == [0, 0, 1, 1, 2]
+    history = cache.student_history("s1")
+    assert [(row["semester"], row["credits"], row["cpi"]) for row in history] == [(1, 15, 9.2)]
+    # An S adds no credits; an F counts with 0 points
+    assert [row["cumulative_credits"] for row in cache.student_history("s2")] == [9, 9]
+    assert cache.student_history("s3")[0]["cpi"] == 0.0
+    assert cache.student_history("missing") == []
+
+
+def test_another_instance_sees_appends(tmp_path):
+    writer = ColumnarCache(str(tmp_path))
+    reader = ColumnarCache(str(tmp_path))
+    writer.append(["s1"], [1], [9], ["A"])
+    assert len(reader) == 1
+    assert reader.students == ["s1"]
+
+
+def test_failed_append_is_trimmed_by_the_next_one(tmp_path, monkeypatch):
+    cache = ColumnarCache(str(tmp_path))
+    cache.append(["s1", "s1"], [1, 1], [9, 6], ["A", "B"])
+
+    def fail(meta):
+        raise OSError("disk full")
+
+    # Column and student files are written, but the row count is never committed
+    monkeypatch.setattr(cache, "_write_meta", fail)
+    with pytest.raises(OSError):
+        cache.append(["s2", "s2", "s2"], [1, 1, 1], [9, 9, 9], ["D", "D", "D"])
+    assert _file_rows(cache, "grade_code") == 5
+    assert len(ColumnarCache(str(tmp_path))) == 2
+    monkeypatch.undo()
+
+    cache.append(["s3"], [1], [4], ["C"])
+    assert len(cache) == 3
+    for name in COLUMNS:
+        assert _file_rows(cache, name) == 3
+    assert cache.students == ["s1", "s3"]
+    assert cache.columns()["credits"].tolist() == [9, 6, 4]
+    assert cache.student_history("s3")[0]["cpi"] == 6.0
+    assert cache.student_history("s2") == []
+
+
+def test_unknown_grade_appends_nothing(tmp_path):
+    cache = ColumnarCache(str(tmp_path))
+    with pytest.raises(ValueError, match="Unknown grade"):
+        cache.append(["s1"], [1], [9], ["Z"])
+    assert len(cache) == 0
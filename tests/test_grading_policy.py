@@ -0,0 +1,138 @@
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import grading_policy
+from cpi_engine import compute_frame
+from grade_scale import GRADE_SCALE
+from grading_policy import REPEAT_BEST, REPEAT_LATEST, GradingPolicy, compute_with_policy
+from ingest import ingest_grade_sheet
+from rounding import TRUNCATE
+
+
+def _frame(rows, columns=("student_id", "semester", "course", "credits", "grade")):
+    return pd.DataFrame(rows, columns=list(columns))
+
+
+def _cpis(result):
+    return result.set_index("semester")["cpi"].to_dict()
+
+
+REPEATED = _frame([
+    ("s1", 1, "MTH101", 9, "C"),
+    ("s1", 1, "PHY101", 6, "A"),
+    ("s1", 2, "MTH101", 9, "A"),
+    ("s1", 3, "MTH101", 9, "B"),
+])
+
+
+def test_repeat_latest_replaces_with_the_last_attempt():
+    policy = GradingPolicy("latest", dict(GRADE_SCALE.points), repeat=REPEAT_LATEST)
+    result = compute_with_policy(REPEATED, policy)
+    # (54 + 60) / 15, then the A replaces the C, then the B replaces the A
+    assert _cpis(result) == {1: 7.6, 2: 10.0, 3: 8.8}
+    assert result["cumulative_credits"].tolist() == [15, 15, 15]
+
+
+def test_repeat_best_keeps_the_best_attempt():
+    policy = GradingPolicy("best", dict(GRADE_SCALE.points), repeat=REPEAT_BEST)
+    result = compute_with_policy(REPEATED, policy)
+    assert _cpis(result) == {1: 7.6, 2: 10.0, 3: 10.0}
+    # The weaker repeat still counts towards the SPI of its own semester
+    assert result.set_index("semester").loc[3, "spi"] == 8.0
+
+
+def test_pass_fail_and_audit_credits():
+    frame = _frame([
+        ("s1", 1, "ESC101", 9, "A"),
+        ("s1", 1, "PE101", 3, "S"),
+        ("s1", 1, "PE102", 3, "X"),
+        ("s1", 1, "HSS101", 4, "AU"),
+        ("s1", 1, "CHM101", 6, "F"),
+    ])
+    row = compute_with_policy(frame).iloc[0]
+    # Only A and F are graded; only A and S earn credits
+    assert row["credits"] == 15
+    assert row["weighted_points"] == 90
+    assert row["earned_credits"] == 12
+    assert row["spi"] == row["cpi"] == 6.0
+
+
+def test_audit_flag_takes_a_course_out_of_the_cpi():
+    frame = _frame([("s1", 1, "ESC101", 9, "A"), ("s1", 1, "MTH101", 9, "D")])
+    frame["audit"] = [False, True]
+    row = compute_with_policy(frame).iloc[0]
+    assert (row["credits"], row["earned_credits"], row["cpi"]) == (9, 9, 10.0)
+
+
+def test_semester_without_graded_credits_has_no_spi():
+    frame = _frame([("s1", 1, "ESC101", 9, "A"), ("s1", 2, "PE101", 3, "S")])
+    result = compute_with_policy(frame)
+    assert np.isnan(result["spi"].iloc[1])
+    assert result["cpi"].tolist() == [10.0, 10.0]
+
+
+def test_each_batch_uses_its_own_rounding(monkeypatch):
+    truncating = GradingPolicy("truncating", dict(GRADE_SCALE.points), rounding=TRUNCATE)
+    monkeypatch.setitem(grading_policy._BATCH_POLICIES, 2020, truncating)
+    frame = _frame([
+        # 65 / 8 = 8.125 for both students
+        ("old", 1, "ESC101", 5, "A"),
+        ("old", 1, "MTH101", 3, "D+"),
+        ("new", 1, "ESC101", 5, "A"),
+        ("new", 1, "MTH101", 3, "D+"),
+    ])
+    frame["batch"] = [2019, 2019, 2021, 2021]
+    result = compute_with_policy(frame).set_index("student_id")
+    assert result.loc["old", "cpi"] == 8.13
+    assert result.loc["new", "cpi"] == 8.12
+
+
+def test_blank_batch_uses_the_default_policy(monkeypatch):
+    truncating = GradingPolicy("truncating", dict(GRADE_SCALE.points), rounding=TRUNCATE)
+    monkeypatch.setitem(grading_policy._BATCH_POLICIES, 2020, truncating)
+    frame = _frame([("old", 1, "ESC101", 5, "A"), ("old", 1, "MTH101", 3, "D+"), ("new", 1, "ESC101", 9, "B")])
+    frame["batch"] = [None, None, 2021]
+    result = compute_with_policy(frame).set_index("student_id")
+    assert result.loc["old", "cpi"] == 8.13
+    assert result.loc["new", "cpi"] == 8.0
+
+
+def test_unrounded_batch_policy(monkeypatch):
+    unrounded = GradingPolicy("unrounded", dict(GRADE_SCALE.points), rounding=None)
+    monkeypatch.setitem(grading_policy._BATCH_POLICIES, 2020, unrounded)
+    frame = _frame([
+        ("old", 1, "ESC101", 5, "A"),
+        ("old", 1, "MTH101", 3, "D+"),
+        ("new", 1, "ESC101", 5, "A"),
+        ("new", 1, "MTH101", 3, "D+"),
+    ])
+    frame["batch"] = [2019, 2019, 2021, 2021]
+    result = compute_with_policy(frame).set_index("student_id")
+    assert result.loc["old", "cpi"] == 8.13
+    assert result.loc["new", "cpi"] == 8.125
+
+
+def test_unknown_grade():
+    with pytest.raises(ValueError, match="Unknown grade"):
+        compute_with_policy(_frame([("s1", 1, "ESC101", 9, "Z")]))
+
+
+def test_bulk_engine_and_ingest_follow_the_default_policy():
+    frame = _frame([
+        ("s1", 1, "ESC101", 9, "A"),
+        ("s1", 1, "CHM101", 6, "F"),
+        ("s1", 2, "PE101", 3, "S"),
+        ("s2", 1, "HSS101", 4, "AU"),
+    ])
+    result = compute_frame(frame)
+    assert result["credits"].tolist() == [15, 0, 0]
+    assert result["cpi"].tolist()[:2] == [6.0, 6.0]
+    assert np.isnan(result["cpi"].iloc[2])
+
+    totals = ingest_grade_sheet(io.StringIO(frame.to_csv(index=False))).set_index("student_id")
+    assert totals.loc["s1", "cpi"] == 6.0
+    assert totals.loc["s2", "credits"] == 0
+    assert np.isnan(totals.loc["s2", "cpi"])
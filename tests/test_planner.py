@@ -0,0 +1,65 @@
+import itertools
+import random
+
+import pytest
+
+from grade_scale import GRADE_SCALE
+from planner import grade_levels, plan_target_cpi
+
+
+def _costs(result):
+    # Grade counts per level, best level first, for each returned plan
+    values, _ = grade_levels()
+    costs = []
+    for plan in result["plans"]:
+        counts = [0] * len(values)
+        for grade in plan["grades"]:
+            counts[values.index(GRADE_SCALE.points[grade])] += 1
+        costs.append(tuple(counts))
+    return costs
+
+
+def _brute_force(current_cpi, current_credits, remaining, target, max_results):
+    values, _ = grade_levels()
+    # Integer hundredths: reaching the target exactly counts
+    needed = round(target * 100) * (current_credits + sum(remaining)) - round(current_cpi * 100) * current_credits
+    seen, costs = set(), []
+    for levels in itertools.product(range(len(values)), repeat=len(remaining)):
+        # Courses with equal credits are interchangeable, so count each assignment once
+        canonical = tuple(sorted(zip(remaining, levels)))
+        if canonical in seen:
+            continue
+        seen.add(canonical)
+        if sum(100 * values[level] * credit for level, credit in zip(levels, remaining)) >= needed:
+            counts = [0] * len(values)
+            for level in levels:
+                counts[level] += 1
+            costs.append(tuple(counts))
+    return sorted(costs)[:max_results]
+
+
+@pytest.mark.parametrize("seed", range(40))
+def test_matches_brute_force(seed):
+    rng = random.Random(seed)
+    remaining = [rng.choice([3, 4, 6, 9, 11]) for _ in range(rng.randint(1, 5))]
+    args = (round(rng.uniform(4, 10), 2), rng.randint(0, 150), remaining, round(rng.uniform(4, 10), 2))
+    result = plan_target_cpi(*args, max_results=5, workers=1)
+    assert result["complete"]
+    assert _costs(result) == _brute_force(*args, max_results=5)
+
+
+def test_plans_reach_the_target():
+    result = plan_target_cpi(7.5, 60, [9, 9, 6, 3], 8.0, workers=1)
+    assert result["plans"]
+    assert all(plan["cpi"] >= 8.0 - 1e-9 for plan in result["plans"])
+
+
+def test_target_reached_exactly():
+    # 5.35 x 36 + 10 x 18 = 6.90 x 54, which float arithmetic misses by one ulp
+    result = plan_target_cpi(5.35, 36, [9, 9], 6.90, workers=1)
+    assert [plan["grades"] for plan in result["plans"]][:1] == [["A", "A"]]
+    assert result["plans"][0]["cpi"] == 6.9
+
+
+def test_unreachable_target_has_no_plans():
+    assert plan_target_cpi(5.0, 150, [9], 9.5, workers=1)["plans"] == []
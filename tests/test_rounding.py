@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from rounding import ROUND_HALF_UP, TRUNCATE, round_cpi
+
+
+def test_half_up_rounds_the_third_decimal_up():
+    # 5 credits of A and 3 of D+: 65 / 8 = 8.125
+    assert round_cpi(65, 8, ROUND_HALF_UP) == 8.13
+    assert round_cpi(2, 3, ROUND_HALF_UP) == 0.67
+
+
+def test_truncate_drops_the_third_decimal():
+    assert round_cpi(65, 8, TRUNCATE) == 8.12
+    assert round_cpi(2, 3, TRUNCATE) == 0.66
+
+
+def test_exact_values_agree():
+    assert round_cpi(153, 18, ROUND_HALF_UP) == round_cpi(153, 18, TRUNCATE) == 8.5
+
+
+def test_arrays_match_scalars():
+    points = np.array([65, 2, 153, 999], dtype=np.int64)
+    credits = np.array([8, 3, 18, 101], dtype=np.int64)
+    for rule in (ROUND_HALF_UP, TRUNCATE):
+        expected = [round_cpi(int(p), int(c), rule) for p, c in zip(points, credits)]
+        assert round_cpi(points, credits, rule).tolist() == expected
+
+
+def test_unknown_rule():
+    with pytest.raises(ValueError):
+        round_cpi(65, 8, "bankers")
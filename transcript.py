@@ -0,0 +1,69 @@
+"""Compact course list: parallel array columns instead of one dict per course."""
+
+from array import array
+
+from grade_scale import GRADE_SCALE
+
+
+class Transcript:
+    # Credits as unsigned bytes, grades as int8 codes into the grade scale options
+
+    __slots__ = ("names", "credits", "grade_codes", "scale")
+
+    def __init__(self, scale=GRADE_SCALE):
+        self.names = []
+        self.credits = array('B')
+        self.grade_codes = array('b')
+        self.scale = scale
+
+    @classmethod
+    def from_rows(cls, rows, scale=GRADE_SCALE):
+        transcript = cls(scale)
+        for name, credit, grade in rows:
+            transcript.append(name, credit, grade)
+        return transcript
+
+    def __len__(self):
+        return len(self.credits)
+
+    def append(self, name, credit, grade):
+        self.names.append(name)
+        self.credits.append(credit)
+        self.grade_codes.append(self.scale.index[grade])
+
+    def pop(self):
+        self.names.pop()
+        self.credits.pop()
+        self.grade_codes.pop()
+
+    def set(self, i, name, credit, grade):
+        self.names[i] = name
+        self.credits[i] = credit
+        self.grade_codes[i] = self.scale.index[grade]
+
+    def grade(self, i):
+        return self.scale.options[self.grade_codes[i]]
+
+    def grade_point(self, i):
+        return self.scale.points[self.grade(i)]
+
+    def rows(self):
+        # (name, credit, grade) tuples, e.g. for the transcript store
+        options = self.scale.options
+        return [(name, credit, options[code]) for name, credit, code in zip(self.names, self.credits, self.grade_codes)]
+
+    def breakdown_columns(self, label="Course", named_only=True):
+        # Column-oriented breakdown table, read straight from the arrays
+        options = self.scale.options
+        points = self.scale.points
+        columns = {label: [], "Credits": [], "Grade": [], "Grade Points": [], "Weighted Points": []}
+        for i, (name, credit, code) in enumerate(zip(self.names, self.credits, self.grade_codes)):
+            if named_only and not name:
+                continue
+            grade = options[code]
+            columns[label].append(name or f"{label} {i+1}")
+            columns["Credits"].append(credit)
+            columns["Grade"].append(grade)
+            columns["Grade Points"].append(points[grade])
+            columns["Weighted Points"].append(points[grade] * credit)
+        return columns
@@ -0,0 +1,118 @@
+"""SQLite-backed transcript store shared by all sessions of the app."""
+
+import sqlite3
+import threading
+from collections import defaultdict
+
+# Quick calculator subjects are stored as courses of this pseudo-semester
+QUICK_SEMESTER = 0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS courses (
+    student_id TEXT NOT NULL,
+    semester INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    credits INTEGER NOT NULL,
+    grade TEXT NOT NULL,
+    PRIMARY KEY (student_id, semester, position)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS semesters (
+    student_id TEXT NOT NULL,
+    semester INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    cpi REAL NOT NULL,
+    credits INTEGER NOT NULL,
+    points INTEGER,
+    PRIMARY KEY (student_id, semester)
+) WITHOUT ROWID;
+"""
+
+
+class TranscriptStore:
+    # One connection per process; the primary keys double as the (student_id, semester) indexes
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        # Stores created before semesters kept their exact grade point totals
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(semesters)")]
+        if "points" not in columns:
+            self._conn.execute("ALTER TABLE semesters ADD COLUMN points INTEGER")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _replace(self, delete_sql, delete_args, insert_sql, rows):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(delete_sql, delete_args)
+                self._conn.executemany(insert_sql, rows)
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    def save_courses(self, student_id, semester, rows):
+        # rows are (name, credits, grade) tuples in entry order
+        self._replace(
+            "DELETE FROM courses WHERE student_id = ? AND semester = ?",
+            (student_id, semester),
+            "INSERT INTO courses VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (student_id, semester, i, name, int(credits), grade)
+                for i, (name, credits, grade) in enumerate(rows)
+            ],
+        )
+
+    def load_courses(self, student_id, semester=None):
+        # Single indexed query; returns {semester: [(name, credits, grade), ...]} in entry order
+        query = "SELECT semester, name, credits, grade FROM courses WHERE student_id = ?"
+        args = [student_id]
+        if semester is not None:
+            query += " AND semester = ?"
+            args.append(semester)
+        query += " ORDER BY semester, position"
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+
+        transcript = defaultdict(list)
+        for sem, name, credits, grade in rows:
+            transcript[sem].append((name, credits, grade))
+        return dict(transcript)
+
+    def save_semesters(self, student_id, semesters):
+        # The exact integer grade points are kept only while the SPI and credits they belong to are unedited
+        self._replace(
+            "DELETE FROM semesters WHERE student_id = ?",
+            (student_id,),
+            "INSERT INTO semesters VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (student_id, i + 1, sem['name'], float(sem['cpi']), int(sem['credits']),
+                 int(sem['points']) if 'points' in sem and sem.get('points_for') == (sem['cpi'], sem['credits']) else None)
+                for i, sem in enumerate(semesters)
+            ],
+        )
+
+    def load_semesters(self, student_id):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, cpi, credits, points FROM semesters WHERE student_id = ? ORDER BY semester",
+                (student_id,),
+            ).fetchall()
+        semesters = []
+        for name, cpi, credits, points in rows:
+            semester = {'name': name, 'cpi': cpi, 'credits': credits}
+            if points is not None:
+                semester.update(points=points, points_for=(cpi, credits))
+            semesters.append(semester)
+        return semesters